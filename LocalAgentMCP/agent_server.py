@@ -1,16 +1,32 @@
 import asyncio
-import json
 import logging
 import os
 import subprocess
 import websockets
-from typing import Dict, Optional, Any
-from fastapi import FastAPI, Request
+from typing import Dict, Optional, Any, Set, Union
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import from core
 from core.tool_loader import load_all_tools
-from core.rpc import handle_rpc
+from core.tool_manifest import import_stats
+from core.tool_loader import PLUGINS_DIR
+from core.tool_watcher import ToolWatcher
+from core.rpc import handle_rpc_request
+from core import http_pool
+from core.model_scheduler import scheduler as model_scheduler
+from core.limits import ToolLimiter
+from core.relay_link import OutboundBuffer, Backoff, advertises_chunking, split_frames, CHUNK_THRESHOLD
+from core.idempotency import IdempotencyCache, request_key
+from core.executor import executor as tool_executor
+from core.cancellation import ToolCancelled, ToolTimeout
+from core.schema_validator import ToolArgumentError
+from core.jobs import jobs, parse_status_params
+from core.catalog_sync import CatalogSnapshot, SYNC_ID
+from core.tool_registry import ToolRegistry
+from core import serializer
+from core.serializer import Encoded
 
 # ==========================================================
 # LOGGING & CONFIG
@@ -25,6 +41,7 @@ RENDER_URL = "wss://mcp-relay-server.onrender.com/ws"
 SERVER_VERSION = "1.1.0" # Updated for Project Spec
 PORT = 8123
 FATIGUE_LIMIT = 30 
+RELAY_CONCURRENCY = 8  # 릴레이 요청 동시 실행 상한 (툴별 상한은 TOOL_DEFINITIONS의 max_concurrency)
 tool_usage_count = 0
 
 # ==========================================================
@@ -35,26 +52,68 @@ def free_port(port: int):
         subprocess.run(f"taskkill /F /IM uvicorn.exe", shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except: pass
 
-TOOLS = load_all_tools()
+tool_registry = ToolRegistry(load_all_tools)
+tool_registry.load()
+tool_limiter = ToolLimiter(tool_registry.snapshot, global_limit=RELAY_CONCURRENCY)
+jobs.configure(limiter=tool_limiter)
+# 툴 해시/직렬화 캐시 + 릴레이가 마지막으로 받은 상태 (재접속 시 delta 기준)
+tool_snapshot = CatalogSnapshot()
+relay_known_tools: Dict[str, str] = {}
+relay_known_hash = ""
+# 현재 연결의 릴레이가 chunk 프레임을 받을 수 있는지 (sync_request의 capabilities로만 켜짐)
+relay_chunking = False
+tool_watcher = ToolWatcher([PLUGINS_DIR])
 render_ws: Optional[websockets.WebSocketClientProtocol] = None
 
-app = FastAPI(title="Local MCP Agent", version=SERVER_VERSION)
+# 실행 중인 릴레이 요청 태스크 (재접속 후에도 계속 실행, 결과는 새 연결로 전송)
+relay_tasks: Set[asyncio.Task] = set()
+# 끊긴 동안 완료된 결과 보관 → 재접속 시 재전송
+outbound = OutboundBuffer()
+reconnect_backoff = Backoff()
+# 같은 요청 id 재시도 시 재실행 방지 (파일 쓰기/쉘 명령 중복 방지)
+idempotency = IdempotencyCache()
+
+class FastJSONResponse(JSONResponse):
+    """응답 본문도 core.serializer로 인코딩 (orjson 있으면 사용)"""
+    def render(self, content: Any) -> bytes:
+        return serializer.dumps_bytes(content)
+
+app = FastAPI(title="Local MCP Agent", version=SERVER_VERSION, default_response_class=FastJSONResponse)
 app.add_middleware(
     CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
 )
 
 @app.get("/")
 def health():
-    return {"status": "running", "connected": render_ws is not None, "tools": len(TOOLS)}
+    return {
+        "status": "running",
+        "connected": render_ws is not None,
+        "tools": len(tool_registry.snapshot),
+        "registry": tool_registry.stats(),
+        "relay_inflight": len(relay_tasks),
+        "outbound": outbound.stats(),
+        "relay_chunking": relay_chunking,
+        "idempotency": idempotency.stats(),
+        "executor": tool_executor.stats(),
+        "jobs": jobs.stats(),
+        "catalog": tool_snapshot.stats(),
+        "tool_imports": import_stats(),
+        "tool_reloads": tool_watcher.reloads,
+        "tool_limits": tool_limiter.stats(),
+        "model_scheduler": model_scheduler.stats(),
+    }
 
 @app.post("/rpc")
 async def rpc_endpoint(request: Request):
     """
-    Standard JSON-RPC 2.0 Endpoint
+    Standard JSON-RPC 2.0 Endpoint (단일 요청 + 배치 배열)
     """
     try:
-        body = await request.json()
-        response = await handle_rpc(body, TOOLS)
+        body = serializer.loads(await request.body())
+        response = await handle_rpc_request(body, tool_registry.snapshot)
+        if response is None:
+            # notification만 있는 배치: 응답 본문 없음
+            return Response(status_code=204)
         return response
     except Exception as e:
         return {"jsonrpc": "2.0", "error": {"code": -32700, "message": "Parse error"}, "id": None}
@@ -62,23 +121,40 @@ async def rpc_endpoint(request: Request):
 # ==========================================================
 # TOOL SYNC
 # ==========================================================
-async def sync_tools():
+async def sync_tools(request: Optional[dict] = None):
+    """
+    - sync_request의 catalog_hash가 현재와 같음 → 해시만 (unchanged)
+    - sync_request에 tool_hashes가 있음 → 그 기준 delta
+    - 해시 없는 sync_request / 접속 직후 → 전체 목록 (직렬화 캐시 사용)
+      (릴레이가 재시작됐을 수 있으므로 새 연결마다 relay_known_tools를 비우고 전체 전송)
+    - 같은 연결에서 핫 리로드 → 마지막으로 보낸 상태 기준 delta
+    - capabilities가 있으면 이 연결의 chunk 전송 여부 갱신
+    """
+    global relay_known_tools, relay_known_hash, relay_chunking
     try:
-        tools_map = {}
-        for name, data in TOOLS.items():
-            tools_map[name] = {
-                "description": data.get("description", ""),
-                "inputSchema": data.get("inputSchema", {})
-            }
-        
-        msg = {
-            "id": "__sync_tools__",
-            "type": "sync_response",
-            "tools": tools_map 
-        }
-        
-        await relay_send(msg)
-        logger.info(f"[Sync] Sent {len(tools_map)} tools.")
+        tool_snapshot.update(tool_registry.snapshot)
+        request = request or {}
+        if "capabilities" in request:
+            relay_chunking = advertises_chunking(request)
+            logger.info(f"[Sync] Relay chunked results: {'on' if relay_chunking else 'off'}")
+        current = tool_snapshot.catalog_hash
+
+        if request.get("catalog_hash") == current:
+            encoded, kind = None, "unchanged"
+        elif isinstance(request.get("tool_hashes"), dict):
+            encoded, kind = tool_snapshot.delta_message(request["tool_hashes"], request.get("catalog_hash", "")), "delta"
+        elif request.get("type") == "sync_request" or request.get("id") == SYNC_ID or not relay_known_tools:
+            encoded, kind = tool_snapshot.full_message(), "full"
+        else:
+            encoded, kind = tool_snapshot.delta_message(relay_known_tools, relay_known_hash), "delta"
+        if encoded is None:
+            encoded, kind = tool_snapshot.unchanged_message(), "unchanged"
+
+        # 툴 목록은 접속할 때마다 새로 보내므로 보관하지 않음
+        if await relay_send_encoded(encoded, SYNC_ID, buffer=False):
+            relay_known_tools = dict(tool_snapshot.hashes)
+            relay_known_hash = current
+            logger.info(f"[Sync] Sent {kind} catalog ({len(tool_snapshot.hashes)} tools, hash={current})")
     except Exception as e:
         logger.error(f"[Sync] Failed: {e}")
 
@@ -86,64 +162,160 @@ async def sync_tools():
 # MESSAGE HANDLER (Relay / WebSocket)
 # ==========================================================
 async def handle_relay_message(raw: str):
-    global tool_usage_count
     try:
-        payload = json.loads(raw)
+        payload = serializer.loads(raw)
     except: return # JSON 파싱 에러는 무시
 
     # 1. Sync
-    if payload.get("id") == "__sync_tools__" or payload.get("type") == "sync_request":
-        await sync_tools()
+    if payload.get("id") == SYNC_ID or payload.get("type") == "sync_request":
+        await sync_tools(payload)
+        return
+
+    # 2. Cancel: {"type": "cancel", "id": <요청 id>}
+    if payload.get("type") == "cancel":
+        found = tool_executor.cancel(("relay", payload.get("id")))
+        logger.info(f"🛑 [CANCEL] id={payload.get('id')} → {'cancelled' if found else 'not running'}")
+        return
+
+    # 3. Background jobs
+    if payload.get("type") in ("job_status", "job_subscribe", "job_cancel"):
+        await handle_job_message(payload)
         return
 
-    # 2. Tool Execution (Custom Protocol from Relay)
+    # 4. Tool Execution (Custom Protocol from Relay)
     rpc_id = payload.get("id")
     tool = payload.get("tool")
     args = payload.get("args", {})
 
     if not tool: return 
 
-    if tool not in TOOLS:
+    # 핫 리로드로 snapshot이 교체돼도 이 요청은 지금 시점의 툴 정의로 실행
+    info = tool_registry.get(tool)
+    if info is None:
         await relay_send({"id": rpc_id, "error": f"Unknown tool: {tool}"})
         return
 
-    if tool == "system.resurrect": tool_usage_count = 0
-    else: tool_usage_count += 1
-    
-    logger.info(f"🚀 [EXEC] {tool}")
+    # "mode": "job" → 즉시 job id 반환, 결과는 job_status/job_subscribe로 조회
+    if payload.get("mode") == "job":
+        try:
+            job = jobs.submit(tool, info, args, payload.get("timeout"))
+        except ValueError as e:
+            await relay_send({"id": rpc_id, "error": str(e)})
+            return
+        await relay_send({"id": rpc_id, "result": {"job_id": job.id, "status": job.status}})
+        return
 
     try:
-        handler = TOOLS[tool]["handler"]
-        
-        # 비동기 핸들러 지원 (파일 쓰기 중 핑 끊김 방지)
-        if asyncio.iscoroutinefunction(handler):
-            result = await handler(args)
-        else:
-            # 동기 핸들러라도 별도 스레드에서 실행하여 메인 루프 보호
-            result = await asyncio.to_thread(handler, args)
-
-        if tool_usage_count >= FATIGUE_LIMIT:
-            warning = "\n[SYSTEM] Context full. Recommend '[환생]'."
-            if isinstance(result, dict): result["_note"] = warning
-            elif isinstance(result, str): result += warning
-            
+        # 재시도된 id는 캐시된 결과 반환 또는 진행 중인 실행에 합류
+        key = request_key(rpc_id, tool, args)
+        result = await idempotency.run(key, lambda: execute_relay_tool(rpc_id, tool, info, args))
         await relay_send({"id": rpc_id, "result": result})
-        logger.info(f"✅ [DONE] {tool}")
+        logger.info(f"✅ [DONE] {tool} (id={rpc_id})")
+
+    except (ToolTimeout, ToolCancelled, ToolArgumentError) as e:
+        logger.warning(f"⏱️ [{e.to_dict()['status'].upper()}] {tool} (id={rpc_id})")
+        await relay_send({"id": rpc_id, "error": str(e), "detail": e.to_dict()})
 
     except Exception as e:
         logger.error(f"❌ [TOOL ERR] {tool}: {e}")
         await relay_send({"id": rpc_id, "error": str(e)})
 
-async def relay_send(data: dict):
-    if render_ws:
-        try: await render_ws.send(json.dumps(data, ensure_ascii=False))
-        except Exception as e: logger.error(f"Send Fail: {e}")
+async def execute_relay_tool(rpc_id: Any, tool: str, info: dict, args: dict):
+    global tool_usage_count
+    if tool == "system.resurrect": tool_usage_count = 0
+    else: tool_usage_count += 1
+
+    # 전역/툴별 동시 실행 상한 안에서 실행
+    async with tool_limiter.acquire(tool):
+        logger.info(f"🚀 [EXEC] {tool} (id={rpc_id})")
+        # async는 루프에서, 동기 핸들러는 kind에 따라 스레드/프로세스 풀에서 (메인 루프 보호)
+        request_id = ("relay", rpc_id) if rpc_id is not None else None
+        result = await tool_executor.run(info, args, name=tool, request_id=request_id)
+
+    if tool_usage_count >= FATIGUE_LIMIT:
+        warning = "\n[SYSTEM] Context full. Recommend '[환생]'."
+        if isinstance(result, dict): result["_note"] = warning
+        elif isinstance(result, str): result += warning
+    return result
+
+async def handle_job_message(payload: dict):
+    """
+    {"type": "job_status", "id", "job_id", "since"}   → 현재 상태 1회 응답
+    {"type": "job_subscribe", "id", "job_id"}         → 끝날 때까지 job_event 프레임 전송
+    {"type": "job_cancel", "id", "job_id"}
+    """
+    rpc_id = payload.get("id")
+    job_id = payload.get("job_id")
+    kind = payload.get("type")
+
+    if kind == "job_cancel":
+        await relay_send({"id": rpc_id, "result": {"cancelled": jobs.cancel(job_id)}})
+        return
+
+    if jobs.get(job_id) is None:
+        await relay_send({"id": rpc_id, "error": f"Unknown job: {job_id}"})
+        return
+
+    if kind == "job_status":
+        try:
+            since, _ = parse_status_params(payload.get("since", 0))
+        except ValueError as e:
+            await relay_send({"id": rpc_id, "error": str(e)})
+            return
+        snapshot = await jobs.status(job_id, since)
+        await relay_send({"id": rpc_id, "result": snapshot})
+        return
+
+    sent = 0
+    async for event in jobs.subscribe(job_id):
+        # 새로 추가된 출력만 전송
+        event["output"] = event["output"][max(sent - event["output_len"] + len(event["output"]), 0):]
+        sent = event["output_len"]
+        await relay_send({"id": rpc_id, "type": "job_event", "job": event})
+
+def dispatch_relay_message(raw: str):
+    """요청마다 별도 태스크로 실행: 느린 툴이 다른 요청을 막지 않음. 응답은 id로 구분되어 끝나는 대로 전송"""
+    task = asyncio.create_task(handle_relay_message(raw))
+    relay_tasks.add(task)
+    task.add_done_callback(_on_relay_task_done)
+
+def _on_relay_task_done(task: asyncio.Task):
+    relay_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error(f"⚠️ Message Handling Error: {task.exception()}")
+
+async def relay_send(data: dict, buffer: bool = True) -> bool:
+    return await relay_send_encoded(Encoded(data), data.get("id"), buffer)
+
+async def relay_send_encoded(encoded: Union[str, Encoded], msg_id: Any = None, buffer: bool = True) -> bool:
+    """이미 직렬화된 메시지 전송. 바로 보냈으면 True (보관/실패는 False)"""
+    if isinstance(encoded, str):
+        encoded = Encoded(text=encoded)
+    ws = render_ws
+    # 재전송 대기분이 있으면 순서를 지키기 위해 뒤에 붙임
+    if ws and not len(outbound):
+        frames = [encoded.text]
+        # 큰 결과는 chunk 프레임으로 나눠 전송 (릴레이가 지원을 알린 연결에서만)
+        # 인코딩은 한 번만: 크기 판단/체크섬은 bytes, 프레임은 같은 결과의 str 사용
+        if relay_chunking and 0 < CHUNK_THRESHOLD < len(encoded):
+            frames = split_frames(msg_id, encoded)
+            logger.info(f"[Relay] id={msg_id} sent as {len(frames) - 1} chunks ({len(encoded)} bytes)")
+        try:
+            for frame in frames:
+                await ws.send(frame)
+            return True
+        except Exception as e:
+            logger.error(f"Send Fail: {e}")
+    if buffer:
+        # 다음 연결의 릴레이가 chunk를 지원하는지 모르므로 원본 한 프레임으로 보관
+        outbound.push(encoded.text)
+    return False
 
 # ==========================================================
 # CONNECTION LOOP (절대 죽지 않는 루프)
 # ==========================================================
 async def connect_to_render():
-    global render_ws
+    global render_ws, relay_known_tools, relay_known_hash, relay_chunking
     while True:
         try:
             logger.info(f"🔌 Connecting to {RENDER_URL} ...")
@@ -156,27 +328,64 @@ async def connect_to_render():
                 ping_timeout=300, 
                 max_size=None
             ) as ws:
-                render_ws = ws
                 logger.info("🔗 Connected! Syncing...")
+                reconnect_backoff.reset()
+                if relay_tasks:
+                    logger.info(f"[Relay] {len(relay_tasks)} requests carried over from previous connection")
+                # 보관된 결과를 먼저 비운 뒤 render_ws 공개 (그 사이 완료된 결과는 큐 뒤에 쌓임)
+                await outbound.flush(ws.send)
+                render_ws = ws
+                await outbound.flush(ws.send)
+                # 새 연결의 릴레이가 이전 카탈로그를 갖고 있다고 가정하지 않음 → 전체 전송
+                relay_known_tools, relay_known_hash = {}, ""
+                relay_chunking = False  # 새 릴레이가 capabilities를 알릴 때까지 한 프레임 전송
                 await sync_tools()
 
                 async for message in ws:
-                    try:
-                        await handle_relay_message(message)
-                    except Exception as e:
-                        logger.error(f"⚠️ Message Handling Error: {e}")
+                    dispatch_relay_message(message)
         
         except Exception as e:
             logger.warning(f"💔 Disconnected: {e}")
+        finally:
             render_ws = None
+            if relay_tasks:
+                # 실행 중인 요청은 취소하지 않음 → 재접속 후 결과 전송
+                logger.warning(f"[Relay] {len(relay_tasks)} requests still running across reconnect")
         
-        logger.info("🔄 Reconnecting in 2 seconds...")
-        await asyncio.sleep(2)
+        delay = reconnect_backoff.next_delay()
+        logger.info(f"🔄 Reconnecting in {delay:.1f} seconds... (buffered: {len(outbound)})")
+        await asyncio.sleep(delay)
+
+# ==========================================================
+# HOT RELOAD (plugins/ 변경 감지)
+# ==========================================================
+async def reload_tools(changed=None):
+    """
+    바뀐 모듈만 다시 import해 새 레지스트리를 만든 뒤 통째로 교체.
+    실행 중인 호출은 이미 잡은 기존 handler로 끝나고, 새 호출부터 새 레지스트리 사용.
+    """
+    delta = await asyncio.to_thread(tool_registry.load, True)
+    tool_limiter.configure(tool_registry.snapshot)
+    logger.info(f"[HotReload] added={delta['added']} changed={delta['changed']} removed={delta['removed']}")
+    if render_ws is not None:
+        await sync_tools()  # 릴레이에는 delta만 전송
 
 @app.on_event("startup")
 async def startup_event():
     logger.info("=== Local Agent Started (Fixed Batch/Async) ===")
     asyncio.create_task(connect_to_render())
+    asyncio.create_task(tool_watcher.run(reload_tools))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in list(relay_tasks):
+        task.cancel()
+    if relay_tasks:
+        await asyncio.gather(*relay_tasks, return_exceptions=True)
+    for job in jobs.list():
+        jobs.cancel(job["job_id"])
+    tool_executor.shutdown()
+    await http_pool.aclose()
 
 if __name__ == "__main__":
     free_port(PORT)
@@ -1,9 +1,11 @@
 import os
 import json
+import asyncio
 import logging
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional, Tuple
 
-# Provider 클래스들이 있다고 가정 (기존 구조 유지)
+from .providers.base import BaseProvider
 from .providers.ollama_provider import OllamaProvider
 from .providers.lmstudio_provider import LMStudioProvider
 from .providers.comfyui_provider import ComfyUIProvider
@@ -59,15 +61,65 @@ def load_config() -> Dict[str, Any]:
 config = load_config()
 
 # -------------------------------------------------------------
-# Provider Factory
+# Provider Factory (provider, url)마다 인스턴스 하나를 재사용
 # -------------------------------------------------------------
-def get_provider(provider_name: str):
-    """Return provider instance by name"""
+PROVIDERS = {
+    "ollama": OllamaProvider,
+    "lmstudio": LMStudioProvider,
+    "comfyui": ComfyUIProvider,
+}
+
+_providers: Dict[Tuple[str, str], BaseProvider] = {}
+_providers_lock = threading.Lock()
+
+def get_provider(provider_name: str, url: Optional[str] = None) -> BaseProvider:
+    """Return pooled provider instance by name and url (url 없으면 provider 기본 주소)"""
     name = provider_name.lower()
-    if name == "ollama": return OllamaProvider()
-    if name == "lmstudio": return LMStudioProvider()
-    if name == "comfyui": return ComfyUIProvider()
-    raise Exception(f"Unsupported provider: {provider_name}")
+    cls = PROVIDERS.get(name)
+    if cls is None:
+        raise Exception(f"Unsupported provider: {provider_name}")
+    key = (name, (url or cls.default_host).rstrip("/"))
+    provider = _providers.get(key)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(key)
+            if provider is None:
+                provider = _providers[key] = cls(key[1])
+                logger.info(f"Provider created: {provider!r}")
+    return provider
+
+def provider_stats() -> Dict[str, Any]:
+    return {"instances": [f"{name}@{url}" for name, url in _providers]}
+
+def _target(section: str, model_key: str) -> Optional[Dict[str, Any]]:
+    """vision/image 설정: 단일 설정({"provider": ...}) 또는 model_key별 설정 모두 지원"""
+    cfg = config.get(section, {})
+    if "provider" in cfg:
+        return cfg
+    return cfg.get(model_key)
+
+# -------------------------------------------------------------
+# Sync shim: 동기 호출자를 위한 전용 이벤트 루프 (스레드 1개, 프로세스 전역)
+# -------------------------------------------------------------
+_shim_loop: Optional[asyncio.AbstractEventLoop] = None
+_shim_lock = threading.Lock()
+
+def _get_shim_loop() -> asyncio.AbstractEventLoop:
+    global _shim_loop
+    with _shim_lock:
+        if _shim_loop is None:
+            _shim_loop = asyncio.new_event_loop()
+            threading.Thread(target=_shim_loop.run_forever, name="ai-registry-loop", daemon=True).start()
+    return _shim_loop
+
+def _run_sync(coro):
+    """코루틴을 shim 루프에서 실행하고 결과를 기다림 (이벤트 루프 안에서는 async 메서드 사용)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run_coroutine_threadsafe(coro, _get_shim_loop()).result()
+    coro.close()
+    raise RuntimeError("AIRegistry sync call inside an event loop; use the async methods (acall_llm ...)")
 
 # -------------------------------------------------------------
 # Public API — Local AI Unified Interface
@@ -82,10 +134,10 @@ class AIRegistry:
         logger.info("AI Registry Reloaded")
 
     @staticmethod
-    def call_llm(prompt: str, system: str = "", character_name: str = "mia"):
+    async def acall_llm(prompt: str, system: str = "", character_name: str = "mia"):
         """
         통합 텍스트 생성 (캐릭터 이름으로 호출)
-        기본값: mia (코딩 담당)
+        기본값: mia (코딩 담당). 캐릭터 설정의 url로 접속
         """
         # 1. 캐릭터 설정 가져오기
         char_config = config.get("characters", {}).get(character_name)
@@ -100,6 +152,7 @@ class AIRegistry:
 
         # 2. 정보 추출
         provider_name = char_config.get("provider", "ollama")
+        url = char_config.get("url")
         model = char_config.get("model", char_config.get("base_model", "qwen2.5-coder:14b"))
         
         # 3. System Prompt 병합
@@ -114,25 +167,38 @@ class AIRegistry:
 
         # 4. Provider 호출
         try:
-            provider = get_provider(provider_name)
-            logger.info(f"🤖 AI Call: [{character_name.upper()}] using [{model}]")
-            return provider.generate_text(prompt=prompt, system=final_system, model=model)
+            provider = get_provider(provider_name, url)
+            logger.info(f"🤖 AI Call: [{character_name.upper()}] using [{model}] @ {provider.host}")
+            return await provider.generate_text(prompt=prompt, system=final_system, model=model)
         except Exception as e:
             return f"[Error] AI Call Failed: {e}"
 
+    @staticmethod
+    async def acall_vision(image_path: str, prompt: str, model_key: str = "primary"):
+        target = _target("vision", model_key)
+        if not target: return "[Error] Vision config not found"
+        provider = get_provider(target["provider"], target.get("url"))
+        return await provider.analyze_image(image_path=image_path, prompt=prompt, model=target["model"])
+
+    @staticmethod
+    async def agenerate_image(prompt: str, workflow: str = None, model_key: str = "diffusion"):
+        target = _target("image", model_key)
+        if not target: return "[Error] Image config not found"
+        provider = get_provider(target["provider"], target.get("url"))
+        final_workflow = workflow or target.get("workflow")
+        return await provider.generate_image(prompt=prompt, workflow=final_workflow)
+
+    # ---------------------------------------------------------
+    # Sync shims (기존 동기 호출자용)
+    # ---------------------------------------------------------
+    @staticmethod
+    def call_llm(prompt: str, system: str = "", character_name: str = "mia"):
+        return _run_sync(AIRegistry.acall_llm(prompt, system, character_name))
+
     @staticmethod
     def call_vision(image_path: str, prompt: str, model_key: str = "primary"):
-        vision_cfg = config.get("vision", {})
-        if model_key not in vision_cfg: return "[Error] Vision config not found"
-        target = vision_cfg[model_key]
-        provider = get_provider(target["provider"])
-        return provider.analyze_image(image_path=image_path, prompt=prompt, model=target["model"])
+        return _run_sync(AIRegistry.acall_vision(image_path, prompt, model_key))
 
     @staticmethod
     def generate_image(prompt: str, workflow: str = None, model_key: str = "diffusion"):
-        image_cfg = config.get("image", {})
-        if model_key not in image_cfg: return "[Error] Image config not found"
-        target = image_cfg[model_key]
-        provider = get_provider(target["provider"])
-        final_workflow = workflow or target.get("workflow")
-        return provider.generate_image(prompt=prompt, workflow=final_workflow)
\ No newline at end of file
+        return _run_sync(AIRegistry.agenerate_image(prompt, workflow, model_key))
\ No newline at end of file
@@ -0,0 +1,204 @@
+# cancellation.py
+# -------------------------------------------------------------
+# 툴 실행 취소 / 타임아웃 지원
+# - CancelScope: 한 번의 툴 실행 동안 띄운 서브프로세스 추적
+#   (executor가 contextvar로 설정 → 스레드 풀 안의 핸들러에서도 보임)
+# - 타임아웃/취소 시 프로세스 트리(자식 포함) 강제 종료
+# - run_subprocess: subprocess.run 대체 (scope에 등록 + 트리 종료 지원)
+#   on_output을 주면 출력을 줄 단위로 흘려보냄 (job 진행 상황 보고용)
+# -------------------------------------------------------------
+import contextvars
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+try:
+    import psutil
+except ImportError:  # 선택 의존성: 없으면 OS 명령으로 트리 종료
+    psutil = None
+
+logger = logging.getLogger("Cancellation")
+
+IS_WINDOWS = sys.platform.startswith("win")
+
+
+class ToolTimeout(Exception):
+    """툴 실행 시간 초과 (구조화된 결과는 to_dict)"""
+
+    def __init__(self, tool: str, timeout: float, elapsed: float, killed: int = 0):
+        super().__init__(f"Tool '{tool}' timed out after {timeout:g}s")
+        self.tool = tool
+        self.timeout = timeout
+        self.elapsed = elapsed
+        self.killed = killed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "timeout",
+            "tool": self.tool,
+            "timeout_s": self.timeout,
+            "elapsed_s": round(self.elapsed, 3),
+            "killed_processes": self.killed,
+        }
+
+
+class ToolCancelled(Exception):
+    """요청 id로 취소됨"""
+
+    def __init__(self, tool: str, elapsed: float, killed: int = 0):
+        super().__init__(f"Tool '{tool}' was cancelled")
+        self.tool = tool
+        self.elapsed = elapsed
+        self.killed = killed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "cancelled",
+            "tool": self.tool,
+            "elapsed_s": round(self.elapsed, 3),
+            "killed_processes": self.killed,
+        }
+
+
+def kill_process_tree(pid: int) -> int:
+    """pid와 모든 자식 프로세스 강제 종료. 종료한 프로세스 수 반환"""
+    if psutil is not None:
+        try:
+            parent = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            return 0
+        procs = parent.children(recursive=True) + [parent]
+        for p in procs:
+            try:
+                p.kill()
+            except psutil.NoSuchProcess:
+                pass
+        psutil.wait_procs(procs, timeout=3)
+        return len(procs)
+
+    try:
+        if IS_WINDOWS:
+            subprocess.run(f"taskkill /F /T /PID {pid}", shell=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            # run_subprocess가 새 세션으로 띄우므로 프로세스 그룹 전체 종료
+            os.killpg(pid, signal.SIGKILL)
+        return 1
+    except (ProcessLookupError, PermissionError, OSError):
+        return 0
+
+
+class CancelScope:
+
+    def __init__(self):
+        self.cancelled = False
+        self.killed = 0
+        self._procs: Set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+
+    def track(self, proc: subprocess.Popen):
+        with self._lock:
+            if self.cancelled:
+                # 취소 이후에 시작된 프로세스는 바로 종료
+                kill_process_tree(proc.pid)
+            self._procs.add(proc)
+
+    def untrack(self, proc: subprocess.Popen):
+        with self._lock:
+            self._procs.discard(proc)
+
+    def cancel(self) -> int:
+        """추적 중인 프로세스 트리 모두 종료"""
+        with self._lock:
+            self.cancelled = True
+            procs = [p for p in self._procs if p.poll() is None]
+        killed = 0
+        for proc in procs:
+            killed += kill_process_tree(proc.pid)
+        self.killed += killed
+        if killed:
+            logger.warning(f"[Cancellation] killed {killed} processes")
+        return killed
+
+
+_current_scope: contextvars.ContextVar[Optional[CancelScope]] = contextvars.ContextVar(
+    "tool_cancel_scope", default=None)
+
+
+def current_scope() -> Optional[CancelScope]:
+    return _current_scope.get()
+
+
+def set_scope(scope: Optional[CancelScope]):
+    return _current_scope.set(scope)
+
+
+def _pump(stream, chunks: List, on_output: Callable):
+    """파이프를 줄 단위로 읽어 모으면서 on_output 호출 (리더 스레드)"""
+    for line in iter(stream.readline, stream.read(0)):
+        chunks.append(line)
+        try:
+            on_output(line)
+        except Exception as e:
+            logger.debug(f"[Cancellation] on_output failed: {e}")
+    stream.close()
+
+
+def _communicate_streaming(proc: subprocess.Popen, timeout: Optional[float], on_output: Callable):
+    out: List = []
+    err: List = []
+    # 리더 스레드에서도 호출한 쪽 contextvar(현재 job 등)가 보이도록 context 복사 (스레드마다 별도)
+    readers = [threading.Thread(target=contextvars.copy_context().run, args=(_pump, stream, chunks, on_output),
+                                daemon=True)
+               for stream, chunks in ((proc.stdout, out), (proc.stderr, err))]
+    for reader in readers:
+        reader.start()
+    proc.wait(timeout=timeout)
+    for reader in readers:
+        reader.join()
+    empty = "" if proc.text_mode else b""
+    return empty.join(out), empty.join(err)
+
+
+def run_subprocess(command, cwd: Optional[str] = None, shell: bool = True,
+                   timeout: Optional[float] = None, on_output: Optional[Callable[[Any], None]] = None,
+                   **popen_kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run(capture_output=True) 대체.
+    현재 CancelScope에 등록되어 툴 타임아웃/취소 시 프로세스 트리째 종료됨.
+    on_output(line): stdout/stderr 한 줄마다 호출 (리더 스레드에서, text 여부에 따라 str/bytes)
+    """
+    scope = current_scope()
+    if scope is not None and scope.cancelled:
+        raise RuntimeError("Tool execution was cancelled")
+
+    # 자식까지 한 번에 정리할 수 있도록 별도 그룹으로 실행
+    if IS_WINDOWS:
+        popen_kwargs.setdefault("creationflags", subprocess.CREATE_NEW_PROCESS_GROUP)
+    else:
+        popen_kwargs.setdefault("start_new_session", True)
+
+    proc = subprocess.Popen(command, shell=shell, cwd=cwd,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, **popen_kwargs)
+    if scope is not None:
+        scope.track(proc)
+    try:
+        if on_output is None:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        else:
+            stdout, stderr = _communicate_streaming(proc, timeout, on_output)
+    except subprocess.TimeoutExpired:
+        kill_process_tree(proc.pid)
+        if on_output is None:
+            proc.communicate()
+        else:
+            proc.wait()
+        raise
+    finally:
+        if scope is not None:
+            scope.untrack(proc)
+    return subprocess.CompletedProcess(proc.args, proc.returncode, stdout, stderr)
@@ -0,0 +1,113 @@
+# catalog_sync.py
+# -------------------------------------------------------------
+# 릴레이 툴 동기화용 카탈로그 스냅샷
+# - 툴별 내용 해시 (description + inputSchema, 키 정렬 JSON의 sha256)
+# - 카탈로그 전체 해시 (이름:해시 목록의 sha256) → 변경 없으면 해시만 전송
+# - 전체 목록 직렬화 결과는 레지스트리가 바뀔 때까지 캐시
+# - 상대가 알고 있는 해시 목록과 비교해 추가/변경/삭제분만 담은 delta 생성
+# -------------------------------------------------------------
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from . import serializer
+
+logger = logging.getLogger("CatalogSync")
+
+SYNC_ID = "__sync_tools__"
+
+
+def public_entry(info: Dict[str, Any]) -> Dict[str, Any]:
+    """릴레이에 노출되는 부분만 (handler 등 내부 필드 제외)"""
+    return {
+        "description": info.get("description", ""),
+        "inputSchema": info.get("inputSchema", {}),
+    }
+
+
+def tool_hash(info: Dict[str, Any]) -> str:
+    cached = info.get("_hash")  # tool_registry에서 미리 계산
+    if cached:
+        return cached
+    canonical = serializer.dumps_bytes(public_entry(info), sort_keys=True)
+    return hashlib.sha256(canonical).hexdigest()[:16]
+
+
+def diff_registries(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """두 레지스트리의 추가/변경/삭제 툴 이름"""
+    changed = [n for n in new if n in old and tool_hash(old[n]) != tool_hash(new[n])]
+    return {
+        "added": [n for n in new if n not in old],
+        "changed": changed,
+        "removed": [n for n in old if n not in new],
+    }
+
+
+class CatalogSnapshot:
+
+    def __init__(self):
+        self._signature: Tuple = ()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hashes: Dict[str, str] = {}
+        self.catalog_hash = ""
+        self._full_message: Optional[str] = None
+        self.builds = 0
+
+    @staticmethod
+    def _signature_of(registry) -> Tuple:
+        return tuple((name, id(info)) for name, info in registry.items())
+
+    def update(self, registry: Dict[str, Dict[str, Any]]) -> bool:
+        """레지스트리가 바뀐 경우에만 재계산. 재계산했으면 True"""
+        signature = self._signature_of(registry)
+        if signature == self._signature:
+            return False
+        self.entries = {name: public_entry(info) for name, info in registry.items()}
+        self.hashes = {name: tool_hash(info) for name, info in registry.items()}
+        listing = "\n".join(f"{name}:{h}" for name, h in sorted(self.hashes.items()))
+        self.catalog_hash = hashlib.sha256(listing.encode("utf-8")).hexdigest()[:16]
+        self._full_message = None
+        self._signature = signature
+        self.builds += 1
+        return True
+
+    def full_message(self) -> str:
+        """전체 목록 sync_response (직렬화 결과 캐시)"""
+        if self._full_message is None:
+            self._full_message = serializer.dumps({
+                "id": SYNC_ID,
+                "type": "sync_response",
+                "catalog_hash": self.catalog_hash,
+                "tool_hashes": self.hashes,
+                "tools": self.entries,
+            })
+        return self._full_message
+
+    def unchanged_message(self) -> str:
+        return serializer.dumps({"id": SYNC_ID, "type": "sync_response", "unchanged": True,
+                                 "catalog_hash": self.catalog_hash})
+
+    def delta_message(self, known: Dict[str, str], base_hash: str = "") -> Optional[str]:
+        """
+        known(상대가 가진 이름→해시) 기준 변경분.
+        변경이 없으면 None → unchanged_message 사용.
+        base_hash: 상대가 자기 상태와 맞는지 확인용 (다르면 상대가 전체 sync_request)
+        """
+        added = {n: self.entries[n] for n in self.hashes if n not in known}
+        changed = {n: self.entries[n] for n, h in self.hashes.items() if n in known and known[n] != h}
+        removed = [n for n in known if n not in self.hashes]
+        if not (added or changed or removed):
+            return None
+        return serializer.dumps({
+            "id": SYNC_ID,
+            "type": "sync_delta",
+            "base_hash": base_hash,
+            "catalog_hash": self.catalog_hash,
+            "tool_hashes": self.hashes,
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tools": len(self.hashes), "catalog_hash": self.catalog_hash, "builds": self.builds}
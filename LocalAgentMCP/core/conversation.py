@@ -0,0 +1,199 @@
+# conversation.py
+# -------------------------------------------------------------
+# 토큰 예산 기반 대화 윈도우
+# - 최근 턴은 원문 그대로 유지
+# - 예산을 넘는 오래된 턴은 작은 모델로 백그라운드 요약(rolling summary)
+# - 매 요청 프롬프트 크기는 budget 이하로 고정
+# -------------------------------------------------------------
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("Conversation")
+
+DEFAULT_TOKEN_BUDGET = 6000
+KEEP_RECENT_MESSAGES = 8
+COMPACT_THRESHOLD = 0.75  # 요약 안 된 구간이 예산의 75%를 넘으면 압축 시작
+
+Summarizer = Callable[[str, List[Dict[str, Any]]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 보수적 추정치 (한글/코드 혼합 기준 약 3자당 1토큰)"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / 3)
+
+
+def message_tokens(msg: Dict[str, Any]) -> int:
+    content = msg.get("content") or ""
+    if not isinstance(content, str):
+        content = str(content)
+    tokens = estimate_tokens(content) + 4  # role/구분자 오버헤드
+    if msg.get("tool_calls"):
+        tokens += estimate_tokens(str(msg["tool_calls"]))
+    return tokens
+
+
+class Conversation:
+    """
+    한 캐릭터의 대화 기록.
+    seq는 대화 전체 기준 절대 번호이고 messages[0]의 seq가 offset이다.
+    summarized_upto 이전 구간은 summary로 대체되어 전송된다.
+    store가 있으면 모든 메시지가 영속화되므로 요약된 구간은 메모리에서 버린다.
+    """
+
+    def __init__(self, budget_tokens: int = DEFAULT_TOKEN_BUDGET,
+                 store=None, character: str = "", session: str = "default"):
+        self.budget_tokens = budget_tokens
+        self.store = store
+        self.character = character
+        self.session = session
+        self.messages: List[Dict[str, Any]] = []
+        self.offset = 0
+        self.summary = ""
+        self.summarized_upto = 0
+        self.compactions = 0
+        self.last_compaction_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def next_seq(self) -> int:
+        return self.offset + len(self.messages)
+
+    def load(self, max_messages: int = 500):
+        """store에서 요약 상태와 요약 이후 메시지 복원"""
+        if not self.store:
+            return
+        state = self.store.load_state(self.character, self.session)
+        if state:
+            self.summary, self.summarized_upto = state
+        last_seq = self.store.max_seq(self.character, self.session)
+        start = max(self.summarized_upto, last_seq + 1 - max_messages)
+        self.messages = self.store.load_range(self.character, self.session, start)
+        self.offset = start if self.messages else last_seq + 1
+
+    def append(self, msg: Dict[str, Any]) -> int:
+        seq = self.next_seq
+        self.messages.append(msg)
+        if self.store:
+            self.store.append(self.character, self.session, seq, msg)
+        return seq
+
+    def _live(self) -> List[Dict[str, Any]]:
+        return self.messages[max(0, self.summarized_upto - self.offset):]
+
+    # ---------------------------------------------------------
+    # 프롬프트 윈도우 구성
+    # ---------------------------------------------------------
+    def system_content(self, system_prompt: str) -> str:
+        if not self.summary:
+            return system_prompt
+        return f"{system_prompt}\n\n[이전 대화 요약]\n{self.summary}"
+
+    def window(self, system_prompt: str) -> List[Dict[str, Any]]:
+        """
+        system(+요약) + 예산 안에 들어가는 최근 메시지.
+        요약이 아직 끝나지 않았어도 오래된 메시지를 잘라 예산을 지킨다.
+        """
+        system = {"role": "system", "content": self.system_content(system_prompt)}
+        remaining = self.budget_tokens - message_tokens(system)
+
+        live = self._live()
+        start = len(live)
+        for i in range(len(live) - 1, -1, -1):
+            cost = message_tokens(live[i])
+            if cost > remaining and start < len(live):
+                break
+            remaining -= cost
+            start = i
+
+        # tool 결과가 호출 메시지 없이 맨 앞에 오지 않도록 정리
+        while start < len(live) - 1 and live[start].get("role") == "tool":
+            start += 1
+
+        return [system] + live[start:]
+
+    def pending_tokens(self) -> int:
+        return sum(message_tokens(m) for m in self._live())
+
+    # ---------------------------------------------------------
+    # 백그라운드 압축
+    # ---------------------------------------------------------
+    def _compaction_cut(self) -> int:
+        """요약할 구간의 끝 seq (user 메시지 경계에서 자름)"""
+        cut = len(self.messages) - KEEP_RECENT_MESSAGES
+        floor = max(0, self.summarized_upto - self.offset)
+        while cut > floor and self.messages[cut].get("role") != "user":
+            cut -= 1
+        return self.offset + max(cut, floor)
+
+    def maybe_compact(self, summarizer: Summarizer) -> bool:
+        """예산 임계치를 넘었으면 요약 태스크 예약. 이미 진행 중이면 무시"""
+        if self._task and not self._task.done():
+            return False
+        if self.pending_tokens() < self.budget_tokens * COMPACT_THRESHOLD:
+            return False
+
+        cut = self._compaction_cut()
+        if cut <= self.summarized_upto:
+            return False
+
+        self._task = asyncio.create_task(self._compact(summarizer, cut))
+        return True
+
+    async def _compact(self, summarizer: Summarizer, cut: int):
+        started = time.perf_counter()
+        chunk = self.messages[max(0, self.summarized_upto - self.offset):cut - self.offset]
+        try:
+            new_summary = await summarizer(self.summary, chunk)
+            if not new_summary:
+                raise RuntimeError("empty summary")
+            # 요약 도중 들어온 메시지는 cut 이후에 있으므로 그대로 유지됨
+            self.summary = new_summary
+            self.summarized_upto = cut
+            if self.store:
+                # 원문은 DB에 있으므로 요약된 구간은 메모리에서 해제
+                self.messages = self.messages[cut - self.offset:]
+                self.offset = cut
+                self.store.save_state(self.character, self.session, self.summary, cut)
+            self.compactions += 1
+            self.last_error = None
+            logger.info(f"[Conversation] compacted {len(chunk)} messages")
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"[Conversation] compaction failed: {e}")
+        finally:
+            self.last_compaction_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "total_messages": self.next_seq,
+            "summarized_messages": self.summarized_upto,
+            "pending_tokens": self.pending_tokens(),
+            "summary": self.summary,
+            "compactions": self.compactions,
+            "compacting": bool(self._task and not self._task.done()),
+            "last_compaction_ms": self.last_compaction_ms,
+            "last_error": self.last_error,
+        }
+
+
+def format_turns(turns: List[Dict[str, Any]], max_chars: int = 2000) -> str:
+    """요약 모델 입력용 텍스트 (메시지당 길이 제한)"""
+    lines = []
+    for m in turns:
+        content = m.get("content") or ""
+        if not isinstance(content, str):
+            content = str(content)
+        if m.get("tool_calls"):
+            names = [c.get("function", {}).get("name") for c in m["tool_calls"]]
+            content = f"(tool call: {', '.join(str(n) for n in names)}) {content}"
+        if len(content) > max_chars:
+            content = content[:max_chars] + " ...(생략)"
+        lines.append(f"{m.get('role', '?')}: {content}")
+    return "\n".join(lines)
@@ -0,0 +1,251 @@
+# executor.py
+# -------------------------------------------------------------
+# 툴 실행 계층
+# - 툴 종류(kind)별로 실행 위치 분리 → 동기 핸들러가 이벤트 루프를 막지 않음
+#     · async : 이벤트 루프에서 바로 await
+#     · io    : 스레드 풀 (파일/네트워크/서브프로세스 대기) ← 동기 핸들러 기본값
+#   (CPU 위주 툴이 없고, 프로세스 풀에서는 CancelScope/진행 보고가 동작하지 않아 프로세스 풀은 두지 않음)
+# - 풀 대기열 깊이 / 사용률 통계. 시간 초과·취소 후에도 끝나지 않은 스레드는 abandoned로 따로 집계
+# - 툴별 타임아웃 ("timeout": 초, 없으면 DEFAULT_TIMEOUT) + 요청 id로 취소
+# - 실행 전 인자 검증 (레지스트리가 컴파일한 _validate, 위반 시 ToolArgumentError)
+#   (스레드 자체는 중단 불가 → run_subprocess로 띄운 프로세스 트리를 종료해 풀어줌)
+# -------------------------------------------------------------
+import asyncio
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from .cancellation import CancelScope, ToolCancelled, ToolTimeout, set_scope
+from .schema_validator import ToolArgumentError
+
+logger = logging.getLogger("Executor")
+
+IO_WORKERS = int(os.environ.get("LOCAL_AGENT_IO_WORKERS", "16"))
+DEFAULT_TIMEOUT = float(os.environ.get("LOCAL_AGENT_TOOL_TIMEOUT", "120"))
+
+KINDS = ("async", "io")
+
+
+def classify(tool: Dict[str, Any]) -> str:
+    """레지스트리에서 미리 계산한 값 → 선언된 kind → 핸들러 형태 순"""
+    kind = tool.get("_kind") or tool.get("kind")
+    if kind in KINDS:
+        return kind
+    if asyncio.iscoroutinefunction(tool.get("handler")):
+        return "async"
+    return "io"
+
+
+def timeout_of(tool: Dict[str, Any]) -> Optional[float]:
+    """툴 선언의 timeout (0 또는 음수면 무제한)"""
+    if "_timeout" in tool:
+        return tool["_timeout"]
+    timeout = tool.get("timeout", DEFAULT_TIMEOUT)
+    if not isinstance(timeout, (int, float)) or timeout <= 0:
+        return None
+    return float(timeout)
+
+
+def parse_timeout(value: Any) -> Optional[float]:
+    """
+    호출자가 지정한 timeout(초). None → None (툴 선언값 사용), 0 이하/무한대 → 0 (무제한).
+    숫자로 해석할 수 없으면 ValueError
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"invalid timeout: {value!r}")
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid timeout: {value!r}") from None
+    if math.isnan(seconds):
+        raise ValueError(f"invalid timeout: {value!r}")
+    if seconds <= 0 or math.isinf(seconds):
+        return 0.0
+    return seconds
+
+
+class _Pool:
+    """concurrent.futures 풀 + 제출/실행/완료 카운터"""
+
+    def __init__(self, name: str, factory: Callable[[], Executor], workers: int,
+                 propagate_context: bool = False):
+        self.name = name
+        self.propagate_context = propagate_context
+        self.workers = workers
+        self._factory = factory
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        # 호출자는 포기했지만(시간 초과/취소) 스레드는 아직 실행 중인 작업
+        self._abandoned: Set[Future] = set()
+        self.abandoned_total = 0
+
+    def _get(self) -> Executor:
+        # 실제로 필요할 때만 생성
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._factory()
+            return self._pool
+
+    async def run(self, func: Callable, *args) -> Any:
+        if self.propagate_context:
+            # 스레드에서도 현재 CancelScope가 보이도록 contextvar 복사
+            future = self._get().submit(contextvars.copy_context().run, func, *args)
+        else:
+            future = self._get().submit(func, *args)
+        with self._lock:
+            self.submitted += 1
+        # 완료 집계는 스레드가 실제로 끝났을 때 (await가 먼저 끝나도 worker는 계속 점유 중)
+        future.add_done_callback(self._finished)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # 시작 전이면 wrap_future가 취소함. 이미 실행 중이면 스레드는 중단 불가 → abandoned
+            with self._lock:
+                if not future.done():
+                    self._abandoned.add(future)
+                    self.abandoned_total += 1
+            raise
+
+    def _finished(self, future: Future):
+        with self._lock:
+            self.completed += 1
+            if not future.cancelled() and future.exception() is not None:
+                self.failed += 1
+            if future in self._abandoned:
+                self._abandoned.discard(future)
+                logger.info(f"[Executor] abandoned {self.name} task finished")
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self.submitted - self.completed
+            abandoned = len(self._abandoned)
+        busy = min(pending, self.workers)
+        return {
+            "workers": self.workers,
+            "started": self._pool is not None,
+            "active": busy,
+            "queued": pending - busy,
+            "abandoned": abandoned,
+            "abandoned_total": self.abandoned_total,
+            "utilization": round(busy / self.workers, 2) if self.workers else 0.0,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+class ToolExecutor:
+
+    def __init__(self, io_workers: int = IO_WORKERS):
+        self.io = _Pool("io", lambda: ThreadPoolExecutor(io_workers, thread_name_prefix="tool-io"), io_workers,
+                        propagate_context=True)
+        self.async_running = 0
+        self._running: Dict[Hashable, Tuple[asyncio.Task, CancelScope]] = {}
+        self.timeouts = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    async def run(self, tool: Dict[str, Any], args: Dict[str, Any], name: str = "",
+                  request_id: Optional[Hashable] = None, timeout: Optional[float] = None) -> Any:
+        """
+        툴 실행. 인자가 inputSchema에 맞지 않으면 ToolArgumentError (handler 호출 전),
+        시간 초과 시 ToolTimeout, cancel(request_id) 시 ToolCancelled.
+        timeout을 주지 않으면 툴 선언값 → DEFAULT_TIMEOUT 순, 0 이하면 무제한.
+        """
+        handler = tool.get("handler")
+        if not handler:
+            raise Exception("Tool has no handler()")
+        validate = tool.get("_validate")
+        if validate is not None:
+            errors = validate(args)
+            if errors:
+                self.rejected += 1
+                raise ToolArgumentError(name or "tool", errors)
+
+        if timeout is None:
+            limit = timeout_of(tool)
+        else:
+            limit = timeout if timeout > 0 else None
+        scope = CancelScope()
+        task = asyncio.ensure_future(self._dispatch(tool, args, scope))
+        if request_id is not None:
+            self._running[request_id] = (task, scope)
+        started = time.monotonic()
+        try:
+            # wait_for 대신 wait: 핸들러가 직접 던진 TimeoutError(httpx/socket 등)는
+            # 기한 초과가 아니라 일반 툴 오류로 그대로 전달해야 함
+            done, _ = await asyncio.wait({task}, timeout=limit)
+            if not done:
+                killed = scope.cancel()
+                task.cancel()
+                await asyncio.wait({task})
+                self.timeouts += 1
+                logger.warning(f"[Executor] {name or 'tool'} timed out after {limit:g}s")
+                raise ToolTimeout(name, limit, time.monotonic() - started, killed)
+            return task.result()
+        except asyncio.CancelledError:
+            if scope.cancelled and task.cancelled():
+                # cancel(request_id)로 내부 task만 취소된 경우 → 구조화된 결과로 변환
+                raise ToolCancelled(name, time.monotonic() - started, scope.killed) from None
+            # 호출자 쪽 취소: wait는 내부 task를 취소하지 않으므로 직접 취소
+            task.cancel()
+            scope.cancel()
+            raise
+        finally:
+            if request_id is not None and self._running.get(request_id, (None,))[0] is task:
+                del self._running[request_id]
+
+    def cancel(self, request_id: Hashable) -> bool:
+        """실행 중인 요청 취소 (프로세스 트리 종료 포함). 없으면 False"""
+        entry = self._running.get(request_id)
+        if entry is None:
+            return False
+        task, scope = entry
+        killed = scope.cancel()
+        task.cancel()
+        self.cancelled += 1
+        logger.info(f"[Executor] cancelled request {request_id} (killed {killed} processes)")
+        return True
+
+    async def _dispatch(self, tool: Dict[str, Any], args: Dict[str, Any], scope: CancelScope) -> Any:
+        set_scope(scope)  # task마다 context가 분리되어 있으므로 reset 불필요
+        handler = tool["handler"]
+        if classify(tool) == "async":
+            self.async_running += 1
+            try:
+                return await handler(args)
+            finally:
+                self.async_running -= 1
+        return await self.io.run(handler, args)
+
+    def shutdown(self):
+        self.io.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running_requests": len(self._running),
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "async_running": self.async_running,
+            "io": self.io.stats(),
+        }
+
+
+# 프로세스 전역 인스턴스 (/rpc, 릴레이 공용)
+executor = ToolExecutor()
@@ -0,0 +1,90 @@
+# file_cache.py
+# -------------------------------------------------------------
+# mtime/size 기반 파일 캐시
+# - 파일이 바뀌지 않았으면 메모리 값 그대로 반환 (디스크 읽기/파싱 생략)
+# - 수정된 파일만 다시 로드 → 캐릭터/설정 핫 에디트 유지
+# - 디렉터리 목록도 디렉터리 mtime으로 캐시
+# -------------------------------------------------------------
+import os
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def _signature(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class FileCache:
+    """
+    loader(path) 결과를 (mtime_ns, size) 키로 캐시.
+    loader는 파일을 읽어 원하는 형태(파싱/렌더링 완료)로 반환해야 한다.
+    """
+
+    def __init__(self, loader: Callable[[str], Any]):
+        self.loader = loader
+        self._entries: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+        self._dirs: Dict[Tuple[str, str], Tuple[int, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.reloads = 0
+        self.errors = 0
+
+    def get(self, path: str) -> Any:
+        """변경되지 않은 파일은 캐시, 변경/신규 파일은 loader로 다시 읽음"""
+        sig = _signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == sig:
+                self.hits += 1
+                return entry[1]
+
+        try:
+            value = self.loader(path)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+        with self._lock:
+            self._entries[path] = (sig, value)
+            self.reloads += 1
+        return value
+
+    def list_dir(self, directory: str, suffix: str = "") -> List[str]:
+        """디렉터리 mtime이 그대로면 이전 파일 목록 재사용 (추가/삭제 시에만 재스캔)"""
+        mtime = os.stat(directory).st_mtime_ns
+        key = (directory, suffix)
+        with self._lock:
+            cached = self._dirs.get(key)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+        files = sorted(
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.endswith(suffix)
+        )
+        with self._lock:
+            self._dirs[key] = (mtime, files)
+            # 삭제된 파일의 캐시 항목 정리
+            for path in [p for p in self._entries if os.path.dirname(p) == directory and p.endswith(suffix) and p not in files]:
+                del self._entries[path]
+        return files
+
+    def invalidate(self, path: str = None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._dirs.clear()
+            else:
+                self._entries.pop(path, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "reloads": self.reloads,
+                "errors": self.errors,
+            }
@@ -0,0 +1,225 @@
+# history_store.py
+# -------------------------------------------------------------
+# SQLite 기반 영속 대화 기록
+# - WAL 모드: 쓰기 중에도 읽기 차단 없음
+# - 쓰기는 전용 스레드에서 배치 트랜잭션으로 처리 (이벤트 루프 비차단)
+# - (character, session, seq) 인덱스 + seq 커서 기반 페이지네이션
+# -------------------------------------------------------------
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("HistoryStore")
+
+_STOP = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    character  TEXT    NOT NULL,
+    session    TEXT    NOT NULL,
+    seq        INTEGER NOT NULL,
+    role       TEXT    NOT NULL,
+    content    TEXT,
+    extra      TEXT,
+    created_at REAL    NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_char_session_seq
+    ON messages (character, session, seq);
+CREATE TABLE IF NOT EXISTS conversation_state (
+    character       TEXT    NOT NULL,
+    session         TEXT    NOT NULL,
+    summary         TEXT,
+    summarized_upto INTEGER NOT NULL,
+    updated_at      REAL    NOT NULL,
+    PRIMARY KEY (character, session)
+);
+"""
+
+
+def _encode(msg: Dict[str, Any]) -> Tuple[str, Optional[str], Optional[str]]:
+    """role/content 외 필드(tool_calls 등)는 extra JSON으로 보관"""
+    content = msg.get("content")
+    if content is not None and not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False)
+    extra = {k: v for k, v in msg.items() if k not in ("role", "content")}
+    return msg.get("role", "user"), content, json.dumps(extra, ensure_ascii=False) if extra else None
+
+
+def _decode(role: str, content: Optional[str], extra: Optional[str]) -> Dict[str, Any]:
+    msg = {"role": role, "content": content or ""}
+    if extra:
+        msg.update(json.loads(extra))
+    return msg
+
+
+class HistoryStore:
+
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 0.25):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        self._reader.executescript(SCHEMA)
+
+        self.written = 0
+        self.batches = 0
+        self._writer = threading.Thread(target=self._write_loop, name="HistoryWriter", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---------------------------------------------------------
+    # Write path (non-blocking enqueue)
+    # ---------------------------------------------------------
+    def append(self, character: str, session: str, seq: int, msg: Dict[str, Any]):
+        role, content, extra = _encode(msg)
+        self._queue.put(("msg", (character, session, seq, role, content, extra, time.time())))
+
+    def save_state(self, character: str, session: str, summary: str, summarized_upto: int):
+        self._queue.put(("state", (character, session, summary, summarized_upto, time.time())))
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            try:
+                self._write_batch(conn, batch)
+            except Exception as e:
+                logger.error(f"[HistoryStore] batch write failed ({len(batch)} rows): {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                self._queue.task_done()
+                break
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch):
+        msgs = [row for kind, row in batch if kind == "msg"]
+        states = [row for kind, row in batch if kind == "state"]
+        with conn:
+            if msgs:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO messages "
+                    "(character, session, seq, role, content, extra, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    msgs,
+                )
+            if states:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO conversation_state "
+                    "(character, session, summary, summarized_upto, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    states,
+                )
+        self.written += len(msgs)
+        self.batches += 1
+
+    def flush(self):
+        """큐에 쌓인 쓰기가 모두 커밋될 때까지 대기 (스레드에서 호출)"""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join(timeout=10)
+        with self._read_lock:
+            self._reader.close()
+
+    # ---------------------------------------------------------
+    # Read path (blocking — asyncio.to_thread로 호출)
+    # ---------------------------------------------------------
+    def max_seq(self, character: str, session: str) -> int:
+        self.flush()
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT MAX(seq) FROM messages WHERE character = ? AND session = ?",
+                (character, session),
+            ).fetchone()
+        return row[0] if row and row[0] is not None else -1
+
+    def load_state(self, character: str, session: str) -> Optional[Tuple[str, int]]:
+        self.flush()
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT summary, summarized_upto FROM conversation_state "
+                "WHERE character = ? AND session = ?",
+                (character, session),
+            ).fetchone()
+        return (row[0] or "", row[1]) if row else None
+
+    def load_range(self, character: str, session: str, start_seq: int) -> List[Dict[str, Any]]:
+        self.flush()
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT role, content, extra FROM messages "
+                "WHERE character = ? AND session = ? AND seq >= ? ORDER BY seq",
+                (character, session, start_seq),
+            ).fetchall()
+        return [_decode(*r) for r in rows]
+
+    def page(self, character: str, session: str, before: Optional[int] = None,
+             limit: int = 50) -> Dict[str, Any]:
+        """
+        최신 메시지부터 limit개. before(seq) 커서를 주면 그 이전 구간.
+        반환: {"messages": [...오래된→최신], "next_cursor": 더 이전 페이지 커서 또는 None}
+        """
+        self.flush()
+        sql = "SELECT seq, role, content, extra FROM messages WHERE character = ? AND session = ?"
+        params: list = [character, session]
+        if before is not None:
+            sql += " AND seq < ?"
+            params.append(before)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+        messages = []
+        for seq, role, content, extra in rows:
+            msg = _decode(role, content, extra)
+            msg["seq"] = seq
+            messages.append(msg)
+        return {
+            "messages": messages,
+            "next_cursor": rows[0][0] if has_more and rows else None,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending_writes": self._queue.qsize(), "written": self.written, "batches": self.batches}
@@ -0,0 +1,124 @@
+# http_pool.py
+# -------------------------------------------------------------
+# 프로세스 전역 HTTP 커넥션 풀 (Ollama / 로컬 서비스 공용)
+# - sync 면: httpx.Client (스레드 안전, 툴 핸들러/Provider용)
+# - async 면: httpx.AsyncClient (이벤트 루프별 1개, Studio/Agent + AIRegistry 동기 shim 루프)
+# - keep-alive 재사용으로 매 호출 TCP 연결/클라이언트 생성 비용 제거
+# -------------------------------------------------------------
+import os
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger("HttpPool")
+
+# -------------------------------------------------------------
+# 설정 (환경변수로 덮어쓰기 가능)
+# -------------------------------------------------------------
+POOL_SIZE = int(os.environ.get("LOCAL_AGENT_HTTP_POOL_SIZE", "20"))
+KEEPALIVE_EXPIRY = float(os.environ.get("LOCAL_AGENT_HTTP_KEEPALIVE", "120"))
+CONNECT_TIMEOUT = float(os.environ.get("LOCAL_AGENT_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("LOCAL_AGENT_HTTP_TIMEOUT", "180"))
+
+_lock = threading.Lock()
+_sync_client: Optional[httpx.Client] = None
+# 루프 → (클라이언트, 설정 세대). 루프가 사라지면 항목도 사라짐
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, int]]" = \
+    weakref.WeakKeyDictionary()
+_async_generation = 0
+
+
+def configure(pool_size: int = None, timeout: float = None,
+              connect_timeout: float = None, keepalive_expiry: float = None):
+    """
+    풀 크기/타임아웃 변경. 이미 만들어진 클라이언트는 닫고
+    다음 호출 시 새 설정으로 재생성된다.
+    """
+    global POOL_SIZE, READ_TIMEOUT, CONNECT_TIMEOUT, KEEPALIVE_EXPIRY, _sync_client
+    with _lock:
+        if pool_size is not None: POOL_SIZE = pool_size
+        if timeout is not None: READ_TIMEOUT = timeout
+        if connect_timeout is not None: CONNECT_TIMEOUT = connect_timeout
+        if keepalive_expiry is not None: KEEPALIVE_EXPIRY = keepalive_expiry
+
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+    # async 클라이언트는 루프 안에서만 닫을 수 있으므로 교체만 표시
+    _mark_async_stale()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=POOL_SIZE,
+        max_keepalive_connections=POOL_SIZE,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def _mark_async_stale():
+    global _async_generation
+    _async_generation += 1
+
+
+# -------------------------------------------------------------
+# Sync face
+# -------------------------------------------------------------
+def get_sync_client() -> httpx.Client:
+    """스레드 간 공유되는 동기 클라이언트"""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        with _lock:
+            if _sync_client is None or _sync_client.is_closed:
+                _sync_client = httpx.Client(limits=_limits(), timeout=_timeout())
+                logger.info(f"[HttpPool] sync client created (pool={POOL_SIZE})")
+    return _sync_client
+
+
+# -------------------------------------------------------------
+# Async face
+# -------------------------------------------------------------
+def get_async_client() -> httpx.AsyncClient:
+    """
+    현재 이벤트 루프에 묶인 비동기 클라이언트.
+    AsyncClient는 루프를 넘나들 수 없으므로 루프마다 하나씩 둔다.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None or entry[0].is_closed or entry[1] != _async_generation:
+        if entry is not None and not entry[0].is_closed:
+            # 설정 변경으로 교체된 이전 클라이언트 정리
+            loop.create_task(entry[0].aclose())
+        client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+        entry = _async_clients[loop] = (client, _async_generation)
+        logger.info(f"[HttpPool] async client created (pool={POOL_SIZE})")
+    return entry[0]
+
+
+# -------------------------------------------------------------
+# Shutdown
+# -------------------------------------------------------------
+def close():
+    """동기 클라이언트 종료"""
+    global _sync_client
+    with _lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+
+
+async def aclose():
+    """앱 종료 시 호출: 현재 루프의 비동기 커넥션 + 동기 커넥션 정리"""
+    entry = _async_clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].aclose()
+    close()
+    logger.info("[HttpPool] connections closed")
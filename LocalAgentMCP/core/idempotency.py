@@ -0,0 +1,79 @@
+# idempotency.py
+# -------------------------------------------------------------
+# 요청 id 기반 멱등 실행
+# - 릴레이/클라이언트 재시도로 같은 id가 다시 오면 툴을 재실행하지 않음
+#   · 최근 완료된 id → 캐시된 결과 반환
+#   · 실행 중인 id → 진행 중인 실행에 합류
+# - 개수 상한(LRU) + TTL
+# - 실패는 캐시하지 않음 → 재시도 시 다시 실행
+# - 키에 인자 해시 포함 (릴레이 재시작 등으로 id가 재사용돼도 다른 호출에 옛 결과를 주지 않음)
+# -------------------------------------------------------------
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from . import serializer
+from .limits import SingleFlight
+
+MAX_ENTRIES = 1000
+TTL_SECONDS = 10 * 60
+
+
+def request_key(request_id: Any, tool: str, args: Any) -> Optional[Hashable]:
+    """(id, 툴, 인자 해시). id가 없으면 None (캐시 안 함)"""
+    if request_id is None:
+        return None
+    digest = hashlib.sha256(serializer.dumps_bytes(args, sort_keys=True)).hexdigest()[:16]
+    return (request_id, tool, digest)
+
+
+class IdempotencyCache:
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._done: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight = SingleFlight()
+        self.hits = 0
+        self.joined = 0
+        self.executed = 0
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._done:
+            key, (stored_at, _) = next(iter(self._done.items()))
+            if now - stored_at <= self.ttl and len(self._done) <= self.max_entries:
+                break
+            self._done.popitem(last=False)
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """key로 한 번만 실행. key가 None이면 캐시 없이 실행"""
+        if key is None:
+            return await func()
+
+        self._expire()
+        if key in self._done:
+            self.hits += 1
+            return self._done[key][1]
+
+        if key in self._inflight:
+            self.joined += 1
+            return await self._inflight.run(key, func)
+
+        async def execute():
+            self.executed += 1
+            result = await func()
+            self._done[key] = (time.monotonic(), result)
+            self._expire()
+            return result
+        return await self._inflight.run(key, execute)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached": len(self._done),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "joined": self.joined,
+            "executed": self.executed,
+        }
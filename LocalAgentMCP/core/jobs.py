@@ -0,0 +1,266 @@
+# jobs.py
+# -------------------------------------------------------------
+# 백그라운드 작업(job) 모드
+# - 어떤 툴이든 비동기로 제출 → job id 즉시 반환
+# - 상태 조회(poll, since 오프셋으로 새 출력만) 또는 구독(subscribe, 이벤트 스트림)
+# - 툴 핸들러는 report()로 진행률/부분 출력 보고 (스레드 풀 안에서도 호출 가능)
+# - 끝난 job은 TTL 동안 결과 보관, 개수 상한 초과 시 오래된 완료 job부터 삭제
+# - 실행은 ToolExecutor 경유 (timeout/취소/프로세스 트리 종료 동일하게 적용)
+#   job의 timeout: 호출자 지정값(0 이하 = 무제한) → 없으면 JOB_TIMEOUT (툴 기본값보다 길게)
+# -------------------------------------------------------------
+import asyncio
+import contextvars
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from .cancellation import ToolCancelled, ToolTimeout
+from .schema_validator import ToolArgumentError
+from .executor import executor, parse_timeout
+
+logger = logging.getLogger("Jobs")
+
+JOB_TTL_SECONDS = 60 * 60
+MAX_JOBS = 500
+MAX_OUTPUT_CHUNKS = 1000
+# job 모드 기본 timeout (초, 0 이하 = 무제한). 장시간 작업용이라 툴 기본값(120초)보다 길게
+JOB_TIMEOUT = float(os.environ.get("LOCAL_AGENT_JOB_TIMEOUT", "3600"))
+MAX_STATUS_WAIT = 60.0  # long-poll 최대 대기 (초)
+
+
+def parse_status_params(since: Any = 0, wait: Any = 0):
+    """status 조회 인자 검증 → (since: int >= 0, wait: 0 ~ MAX_STATUS_WAIT). 잘못된 값이면 ValueError"""
+    if isinstance(since, bool) or isinstance(wait, bool):
+        raise ValueError("since/wait must be numbers")
+    try:
+        since = int(since or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid since: {since!r} (expected integer >= 0)") from None
+    try:
+        wait = float(wait or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid wait: {wait!r} (expected seconds)") from None
+    if since < 0:
+        raise ValueError(f"invalid since: {since} (expected integer >= 0)")
+    if wait != wait:  # NaN
+        raise ValueError("invalid wait: NaN")
+    return since, min(max(wait, 0.0), MAX_STATUS_WAIT)
+
+TERMINAL = ("succeeded", "failed", "timeout", "cancelled")
+
+
+class Job:
+
+    def __init__(self, tool: str, args: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.tool = tool
+        self.args = args
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.progress: Optional[float] = None
+        self.message: Optional[str] = None
+        self.output: List[str] = []
+        self.output_offset = 0  # 상한 초과로 버린 앞부분 개수
+        self.result: Any = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL
+
+    def snapshot(self, since: int = 0) -> Dict[str, Any]:
+        """since 이후의 출력만 포함 (전체 출력 개수는 output_len)"""
+        start = max(since - self.output_offset, 0)
+        return {
+            "job_id": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "output": self.output[start:],
+            "output_len": self.output_offset + len(self.output),
+            "result": self.result if self.status == "succeeded" else None,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+_current_job: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar("current_job", default=None)
+
+
+class JobManager:
+
+    def __init__(self, ttl: float = JOB_TTL_SECONDS, max_jobs: int = MAX_JOBS):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.limiter = None
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.submitted = 0
+
+    def configure(self, limiter=None):
+        """agent_server의 ToolLimiter 공유 (툴별 동시 실행 상한 유지)"""
+        self.limiter = limiter
+
+    # ---------------------------------------------------------
+    # Submit / Run
+    # ---------------------------------------------------------
+    def submit(self, name: str, tool: Dict[str, Any], args: Dict[str, Any],
+               timeout: Any = None) -> Job:
+        """timeout이 숫자로 해석되지 않으면 ValueError (job 생성 전)"""
+        timeout = parse_timeout(timeout)
+        if timeout is None:
+            timeout = max(JOB_TIMEOUT, 0.0)
+        self._loop = asyncio.get_running_loop()
+        self.sweep()
+        job = Job(name, args)
+        self._jobs[job.id] = job
+        self.submitted += 1
+        job.task = asyncio.create_task(self._run(job, tool, timeout))
+        logger.info(f"[Jobs] submitted {name} → {job.id}")
+        return job
+
+    async def _run(self, job: Job, tool: Dict[str, Any], timeout: Optional[float]):
+        _current_job.set(job)  # executor가 context를 복사하므로 스레드 안의 report()에서도 보임
+        try:
+            if self.limiter is not None:
+                async with self.limiter.acquire(job.tool):
+                    self._set_running(job)
+                    job.result = await executor.run(tool, job.args, name=job.tool, timeout=timeout)
+            else:
+                self._set_running(job)
+                job.result = await executor.run(tool, job.args, name=job.tool, timeout=timeout)
+            job.status = "succeeded"
+            job.progress = 1.0
+        except ToolTimeout as e:
+            job.status, job.error = "timeout", e.to_dict()
+        except ToolArgumentError as e:
+            job.status, job.error = "failed", e.to_dict()
+        except (ToolCancelled, asyncio.CancelledError):
+            job.status, job.error = "cancelled", {"status": "cancelled", "tool": job.tool}
+        except Exception as e:
+            job.status, job.error = "failed", {"status": "failed", "tool": job.tool, "message": str(e)}
+        finally:
+            job.finished_at = time.time()
+            self._notify(job)
+            logger.info(f"[Jobs] {job.tool} ({job.id}) → {job.status}")
+
+    def _set_running(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        self._notify(job)
+
+    # ---------------------------------------------------------
+    # Progress (핸들러에서 호출)
+    # ---------------------------------------------------------
+    def _report(self, job: Job, progress: Optional[float], message: Optional[str], output: Optional[str]):
+        if progress is not None:
+            job.progress = max(0.0, min(1.0, float(progress)))
+        if message is not None:
+            job.message = message
+        if output:
+            job.output.append(output)
+            overflow = len(job.output) - MAX_OUTPUT_CHUNKS
+            if overflow > 0:
+                del job.output[:overflow]
+                job.output_offset += overflow
+        self._notify(job)
+
+    def _notify(self, job: Job):
+        snapshot = job.snapshot()
+        for queue in list(job.subscribers):
+            queue.put_nowait(snapshot)
+        job.changed.set()
+        job.changed = asyncio.Event()
+
+    # ---------------------------------------------------------
+    # Query
+    # ---------------------------------------------------------
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def status(self, job_id: str, since: int = 0, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """wait > 0 이면 변화가 생기거나 끝날 때까지 최대 wait초 대기 (long-poll)"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if wait > 0 and not job.done and job.output_offset + len(job.output) <= since:
+            try:
+                await asyncio.wait_for(job.changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+        return job.snapshot(since)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """현재 상태부터 시작해 끝날 때까지 이벤트 스트림"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        job.subscribers.add(queue)
+        try:
+            yield job.snapshot()
+            while not job.done:
+                event = await queue.get()
+                yield event
+                if event["status"] in TERMINAL:
+                    break
+        finally:
+            job.subscribers.discard(queue)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job.task.cancel()  # executor가 서브프로세스 트리까지 정리
+        return True
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [{"job_id": j.id, "tool": j.tool, "status": j.status, "progress": j.progress}
+                for j in self._jobs.values()]
+
+    def sweep(self):
+        """TTL 지난 완료 job 삭제 + 상한 초과 시 오래된 완료 job부터 삭제"""
+        now = time.time()
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            if job.done and (now - job.finished_at > self.ttl or len(self._jobs) > self.max_jobs):
+                del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"jobs": len(self._jobs), "submitted": self.submitted, "by_status": counts}
+
+
+# 프로세스 전역 인스턴스 (릴레이, /rpc 공용)
+jobs = JobManager()
+
+
+def report(progress: Optional[float] = None, message: Optional[str] = None, output: Optional[str] = None):
+    """
+    툴 핸들러에서 진행 상황 보고. job으로 실행 중이 아니면 아무 일도 하지 않음.
+    스레드 풀에서 호출돼도 이벤트 루프 쪽에서 안전하게 반영.
+    """
+    job = _current_job.get()
+    if job is None or jobs._loop is None:
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is jobs._loop:
+        jobs._report(job, progress, message, output)
+    else:
+        jobs._loop.call_soon_threadsafe(jobs._report, job, progress, message, output)
@@ -0,0 +1,131 @@
+# limits.py
+# -------------------------------------------------------------
+# 툴 동시 실행 제한
+# - 전역 상한 (프로세스 전체 동시 실행 수)
+# - 툴별 상한: TOOL_DEFINITIONS의 "max_concurrency" 값
+#   (예: Named Pipe를 쓰는 unity 툴은 1)
+# - SingleFlight: 같은 key의 동시 실행을 하나로 합침 (vision, idempotency 공용)
+# -------------------------------------------------------------
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+DEFAULT_GLOBAL_LIMIT = 8
+
+
+class ToolLimiter:
+
+    def __init__(self, registry: Dict[str, Dict[str, Any]] = None,
+                 global_limit: int = DEFAULT_GLOBAL_LIMIT):
+        self.global_limit = global_limit
+        self._global = asyncio.Semaphore(global_limit)
+        self._per_tool: Dict[str, asyncio.Semaphore] = {}
+        self._limits: Dict[str, int] = {}
+        self.running: Dict[str, int] = {}
+        self.waiting = 0
+        if registry:
+            self.configure(registry)
+
+    def configure(self, registry: Dict[str, Dict[str, Any]]):
+        """레지스트리의 max_concurrency 선언 반영 (값이 바뀐 툴만 세마포어 재생성)"""
+        limits = {}
+        for name, info in registry.items():
+            limit = info.get("max_concurrency")
+            if isinstance(limit, int) and limit > 0:
+                limits[name] = limit
+        for name, limit in limits.items():
+            if self._limits.get(name) != limit:
+                self._per_tool[name] = asyncio.Semaphore(limit)
+        for name in set(self._per_tool) - set(limits):
+            del self._per_tool[name]
+        self._limits = limits
+
+    @asynccontextmanager
+    async def acquire(self, tool: str):
+        """툴별 → 전역 순서로 획득 (툴별 대기 중에는 전역 슬롯을 점유하지 않음)"""
+        per_tool: Optional[asyncio.Semaphore] = self._per_tool.get(tool)
+        self.waiting += 1
+        try:
+            if per_tool:
+                await per_tool.acquire()
+            try:
+                await self._global.acquire()
+            except BaseException:
+                if per_tool:
+                    per_tool.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        self.running[tool] = self.running.get(tool, 0) + 1
+        try:
+            yield
+        finally:
+            self.running[tool] -= 1
+            if not self.running[tool]:
+                del self.running[tool]
+            self._global.release()
+            if per_tool:
+                per_tool.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "global_limit": self.global_limit,
+            "running": sum(self.running.values()),
+            "waiting": self.waiting,
+            "per_tool_running": dict(self.running),
+            "per_tool_limits": dict(self._limits),
+        }
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    key별 진행 중인 실행. 같은 key가 다시 오면 새로 실행하지 않고 결과를 공유.
+    실행은 별도 task → 먼저 부른 쪽이 취소돼도 나머지 대기자는 결과를 받음.
+    대기자가 모두 취소되면 그때 task 취소
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Flight] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda task: self._finished(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # 마지막 대기자: 결과를 받을 쪽이 없으므로 실행 취소 (새 호출은 새로 시작)
+                self._discard(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _discard(self, key: Hashable, flight: _Flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def _finished(self, key: Hashable, flight: _Flight):
+        self._discard(key, flight)
+        if not flight.task.cancelled():
+            flight.task.exception()  # 대기자가 없어도 'never retrieved' 경고 없이 정리
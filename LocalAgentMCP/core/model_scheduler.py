@@ -0,0 +1,216 @@
+# model_scheduler.py
+# -------------------------------------------------------------
+# 모델 상주(residency) 스케줄러
+# - 캐릭터마다 모델이 달라서 번갈아 호출하면 Ollama가 가중치를 내렸다 올림
+# - 모델별 대기열을 두고, 같은 모델 요청을 묶어서 연속 처리
+# - 다른 모델이 기다리면 batch_limit 이후 교체 (기아 방지)
+# - keep_alive를 상황에 맞게 지정
+#     · 다음에도 같은 모델 → 길게 유지
+#     · 다른 모델이 대기 중이고 이 모델 대기열이 비면 → 즉시 내림("0")
+# - sync(스레드) / async 호출자 모두 같은 대기열 사용
+# -------------------------------------------------------------
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Optional
+
+from . import http_pool
+from . import serializer
+
+logger = logging.getLogger("ModelScheduler")
+
+KEEP_ALIVE_RESIDENT = "30m"   # 대기 중인 다른 모델이 없을 때
+KEEP_ALIVE_RELEASE = "0"      # 교체 직전 마지막 요청: 바로 VRAM 반환
+# 같은 모델 동시 요청 수: Ollama OLLAMA_NUM_PARALLEL 과 맞춤 (LOCAL_AGENT_MODEL_PARALLEL로 따로 지정 가능)
+MAX_PARALLEL_PER_MODEL = max(1, int(os.environ.get("LOCAL_AGENT_MODEL_PARALLEL",
+                                                   os.environ.get("OLLAMA_NUM_PARALLEL", "1"))))
+BATCH_LIMIT = 8               # 다른 모델이 기다릴 때 현재 모델 연속 처리 최대 횟수
+
+
+class Ticket:
+    __slots__ = ("id", "model", "enqueued_at", "granted", "cancelled",
+                 "keep_alive", "event", "future", "loop")
+
+    def __init__(self, ticket_id: int, model: str):
+        self.id = ticket_id
+        self.model = model
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+        self.keep_alive = KEEP_ALIVE_RESIDENT
+        self.event: Optional[threading.Event] = None
+        self.future: Optional[asyncio.Future] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(True)
+
+
+class ModelScheduler:
+
+    def __init__(self, max_parallel: int = MAX_PARALLEL_PER_MODEL, batch_limit: int = BATCH_LIMIT):
+        self.max_parallel = max_parallel
+        self.batch_limit = batch_limit
+
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[Ticket]] = {}
+        self._ids = itertools.count(1)
+        self.current_model: Optional[str] = None
+        self.active = 0
+        self._served_in_batch = 0
+
+        self.swaps = 0
+        self.granted = 0
+        self.total_wait = 0.0
+
+    # ---------------------------------------------------------
+    # Core (lock 보유 상태에서 호출)
+    # ---------------------------------------------------------
+    def _others_waiting(self, model: str) -> bool:
+        return any(q for m, q in self._queues.items() if m != model)
+
+    def _pick_next_model(self) -> Optional[str]:
+        """가장 오래 기다린 요청의 모델"""
+        oldest = None
+        for model, q in self._queues.items():
+            if q and (oldest is None or q[0].enqueued_at < oldest.enqueued_at):
+                oldest = q[0]
+        return oldest.model if oldest else None
+
+    def _grant(self, ticket: Ticket):
+        queue = self._queues[ticket.model]
+        queue.popleft()
+        if not queue:
+            del self._queues[ticket.model]
+
+        ticket.granted = True
+        self.active += 1
+        self._served_in_batch += 1
+        self.granted += 1
+        self.total_wait += time.monotonic() - ticket.enqueued_at
+
+        # 이 모델 대기열이 비었고 다른 모델이 기다리면 끝나자마자 내림
+        if ticket.model not in self._queues and self._others_waiting(ticket.model):
+            ticket.keep_alive = KEEP_ALIVE_RELEASE
+        else:
+            ticket.keep_alive = KEEP_ALIVE_RESIDENT
+
+        if ticket.future is not None:
+            ticket.loop.call_soon_threadsafe(_resolve, ticket.future)
+        else:
+            ticket.event.set()
+
+    def _dispatch(self):
+        while True:
+            current_q = self._queues.get(self.current_model)
+            # 1) 현재 모델 계속 처리 (다른 모델이 기다리면 batch_limit까지만)
+            if current_q and self.active < self.max_parallel:
+                if self._served_in_batch < self.batch_limit or not self._others_waiting(self.current_model):
+                    self._grant(current_q[0])
+                    continue
+            # 2) 진행 중인 요청이 모두 끝났을 때만 모델 교체
+            if self.active == 0:
+                nxt = self._pick_next_model()
+                if nxt is None:
+                    return
+                if nxt != self.current_model:
+                    if self.current_model is not None:
+                        self.swaps += 1
+                        logger.info(f"[ModelScheduler] swap {self.current_model} → {nxt}")
+                    self.current_model = nxt
+                self._served_in_batch = 0
+                self._grant(self._queues[nxt][0])
+                continue
+            return
+
+    def _enqueue(self, ticket: Ticket):
+        with self._lock:
+            self._queues.setdefault(ticket.model, deque()).append(ticket)
+            self._dispatch()
+
+    def _release(self, ticket: Ticket):
+        with self._lock:
+            self.active -= 1
+            self._dispatch()
+
+    def _cancel(self, ticket: Ticket):
+        """대기 중 취소. 그 사이 이미 배정됐다면 반납"""
+        with self._lock:
+            ticket.cancelled = True
+            if ticket.granted:
+                self.active -= 1
+            else:
+                queue = self._queues.get(ticket.model)
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[ticket.model]
+            self._dispatch()
+
+    # ---------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------
+    @contextmanager
+    def slot_sync(self, model: str, timeout: Optional[float] = None):
+        """스레드(동기) 호출자용. with 블록 동안 해당 모델 실행 권한 보유"""
+        ticket = Ticket(next(self._ids), model)
+        ticket.event = threading.Event()
+        self._enqueue(ticket)
+        if not ticket.event.wait(timeout):
+            self._cancel(ticket)
+            raise TimeoutError(f"Model slot wait timed out: {model}")
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    @asynccontextmanager
+    async def slot(self, model: str):
+        """async 호출자용. 대기 중 스레드를 점유하지 않음"""
+        ticket = Ticket(next(self._ids), model)
+        ticket.loop = asyncio.get_running_loop()
+        ticket.future = ticket.loop.create_future()
+        self._enqueue(ticket)
+        try:
+            await ticket.future
+        except BaseException:
+            self._cancel(ticket)
+            raise
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "current_model": self.current_model,
+                "active": self.active,
+                "queue_depth": {m: len(q) for m, q in self._queues.items()},
+                "swaps": self.swaps,
+                "granted": self.granted,
+                "avg_wait_ms": round(self.total_wait / self.granted * 1000, 1) if self.granted else 0.0,
+            }
+
+
+# 프로세스 전역 인스턴스 (Studio, AIRegistry, OllamaClient 공용)
+scheduler = ModelScheduler()
+
+
+async def preload(model: str, host: str = "http://localhost:11434"):
+    """모델을 미리 올려 둠 (프롬프트 없는 generate 요청은 로드만 수행)"""
+    async with scheduler.slot(model) as ticket:
+        client = http_pool.get_async_client()
+        resp = await client.post(f"{host}/api/generate", **serializer.request_body({
+            "model": model,
+            "keep_alive": ticket.keep_alive,
+        }))
+        resp.raise_for_status()
+    logger.info(f"[ModelScheduler] preloaded {model}")
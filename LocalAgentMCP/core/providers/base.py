@@ -0,0 +1,25 @@
+# base.py
+# -------------------------------------------------------------
+# Provider 공통 인터페이스 (async 우선)
+# - 인스턴스는 (provider, url)마다 하나만 만들어 재사용 (core/ai_registry.get_provider)
+#   → 상태는 host 정도만 두고, 커넥션은 http_pool의 루프별 AsyncClient 공유
+# - 지원하지 않는 기능은 안내 문자열 반환 (기존 placeholder 동작 유지)
+# -------------------------------------------------------------
+class BaseProvider:
+    name = "base"
+    default_host = ""
+
+    def __init__(self, host: str = None):
+        self.host = (host or self.default_host).rstrip("/")
+
+    async def generate_text(self, prompt: str, system: str = "", model: str = None) -> str:
+        return f"{self.name} text generation not supported."
+
+    async def analyze_image(self, image_path: str, prompt: str, model: str = None) -> str:
+        return f"{self.name} vision not supported."
+
+    async def generate_image(self, prompt: str, workflow: str = "default") -> str:
+        return f"{self.name} image generation not supported."
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.host})"
@@ -1,10 +1,12 @@
 import logging
 
+from .base import BaseProvider
+
 logger = logging.getLogger("ComfyUIProvider")
 
-class ComfyUIProvider:
-    def __init__(self, host="http://127.0.0.1:8188"):
-        self.host = host
+class ComfyUIProvider(BaseProvider):
+    name = "comfyui"
+    default_host = "http://127.0.0.1:8188"
 
-    def generate_image(self, prompt: str, workflow: str = "default"):
+    async def generate_image(self, prompt: str, workflow: str = "default"):
         return "Image generation not implemented yet in this basic provider."
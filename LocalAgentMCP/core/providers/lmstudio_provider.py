@@ -1,10 +1,12 @@
 import logging
 
+from .base import BaseProvider
+
 logger = logging.getLogger("LMStudioProvider")
 
-class LMStudioProvider:
-    def __init__(self, host="http://localhost:1234"):
-        self.host = host
+class LMStudioProvider(BaseProvider):
+    name = "lmstudio"
+    default_host = "http://localhost:1234"
 
-    def generate_text(self, prompt: str, system: str = "", model: str = "local-model"):
+    async def generate_text(self, prompt: str, system: str = "", model: str = "local-model"):
         return "LMStudio generation not implemented yet."
@@ -1,35 +1,47 @@
-import requests
-import json
+import base64
+import asyncio
 import logging
 
+from ..http_pool import get_async_client
+from ..model_scheduler import scheduler
+from .. import serializer
+from .base import BaseProvider
+
 logger = logging.getLogger("OllamaProvider")
 
-class OllamaProvider:
-    def __init__(self, host="http://localhost:11434"):
-        self.host = host
+def _read_base64(path: str) -> str:
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode("ascii")
+
+class OllamaProvider(BaseProvider):
+    name = "ollama"
+    default_host = "http://localhost:11434"
 
-    def generate_text(self, prompt: str, system: str = "", model: str = "qwen2.5-coder:14b"):
-        url = f"{self.host}/api/generate"
-        
+    async def _generate(self, payload: dict) -> str:
+        model = payload["model"]
+        # 모델 교체 최소화: 같은 모델 요청끼리 묶어서 실행 (대기 중 스레드 점유 없음)
+        async with scheduler.slot(model) as ticket:
+            payload["keep_alive"] = ticket.keep_alive
+            response = await get_async_client().post(f"{self.host}/api/generate",
+                                                      **serializer.request_body(payload))
+        response.raise_for_status()
+        return serializer.loads(response.content).get("response", "")
+
+    async def generate_text(self, prompt: str, system: str = "", model: str = "qwen2.5-coder:14b"):
         full_prompt = prompt
         if system:
             full_prompt = f"System: {system}\nUser: {prompt}"
 
-        payload = {
-            "model": model,
-            "prompt": full_prompt,
-            "stream": False
-        }
-
         try:
-            response = requests.post(url, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("response", "")
+            return await self._generate({"model": model, "prompt": full_prompt, "stream": False})
         except Exception as e:
             logger.error(f"Ollama generation failed: {e}")
             return f"Error: {e}"
 
-    def analyze_image(self, image_path: str, prompt: str, model: str = "llava"):
-        # Placeholder for vision
-        return "Vision not implemented yet in this basic provider."
+    async def analyze_image(self, image_path: str, prompt: str, model: str = "llava"):
+        try:
+            image = await asyncio.to_thread(_read_base64, image_path)
+            return await self._generate({"model": model, "prompt": prompt, "images": [image], "stream": False})
+        except Exception as e:
+            logger.error(f"Ollama vision failed: {e}")
+            return f"Error: {e}"
@@ -0,0 +1,157 @@
+# relay_link.py
+# -------------------------------------------------------------
+# Render 릴레이 연결 보조
+# - OutboundBuffer: 연결이 끊긴 동안 나가는 결과를 보관 → 재접속 시 재전송
+#   (상한 초과 시 가장 오래된 메시지부터 버림)
+# - Backoff: 지터가 들어간 지수 백오프 재접속 간격
+# - split_frames: 큰 결과를 번호 붙은 chunk 프레임 + 체크섬 프레임으로 분할
+#   릴레이가 sync_request의 "capabilities"에 "chunked_results"를 알린 연결에서만 사용
+#   (기존 릴레이는 {id, result}만 처리. LOCAL_AGENT_CHUNK_THRESHOLD=0이면 항상 끔)
+#     {"id", "type": "chunk", "seq", "total", "encoding", "data"} × total
+#     {"id", "type": "chunk_end", "total", "bytes", "sha256"}
+#   수신 측: data를 순서대로 디코딩해 이어 붙임 → UTF-8 바이트 sha256 확인 → 원래 JSON 메시지
+#   encoding: "text" (원문 조각) 또는 "zlib+base64" (프레임별 압축)
+# -------------------------------------------------------------
+import base64
+import hashlib
+import logging
+import os
+import random
+import zlib
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Union
+
+from . import serializer
+from .serializer import Encoded
+
+logger = logging.getLogger("RelayLink")
+
+OUTBOUND_MAX_MESSAGES = 500
+OUTBOUND_MAX_BYTES = 64 * 1024 * 1024
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+CHUNK_CAPABILITY = "chunked_results"
+CHUNK_THRESHOLD = int(os.environ.get("LOCAL_AGENT_CHUNK_THRESHOLD", str(256 * 1024)))
+CHUNK_SIZE = int(os.environ.get("LOCAL_AGENT_CHUNK_SIZE", str(64 * 1024)))
+# websockets가 permessage-deflate를 협상하면 중복 압축이므로 기본은 꺼 둠
+CHUNK_COMPRESS = os.environ.get("LOCAL_AGENT_CHUNK_COMPRESS", "0") == "1"
+
+
+def advertises_chunking(message: Dict[str, Any]) -> bool:
+    """릴레이 메시지의 capabilities에 chunk 프레임 수신 지원이 있는지"""
+    capabilities = message.get("capabilities")
+    return isinstance(capabilities, (list, tuple)) and CHUNK_CAPABILITY in capabilities
+
+
+def split_frames(msg_id: Any, encoded: Union[str, Encoded], chunk_size: int = CHUNK_SIZE,
+                 compress: bool = CHUNK_COMPRESS) -> List[str]:
+    """직렬화된 메시지를 chunk 프레임 목록으로 분할 (마지막은 체크섬 프레임)"""
+    if isinstance(encoded, str):
+        encoded = Encoded(text=encoded)
+    raw = encoded.bytes
+    if compress:
+        encoding = "zlib+base64"
+        pieces = [base64.b64encode(zlib.compress(raw[i:i + chunk_size])).decode("ascii")
+                  for i in range(0, len(raw), chunk_size)]
+    else:
+        # 문자 단위로 잘라 멀티바이트 문자가 깨지지 않게 함
+        encoding = "text"
+        text = encoded.text
+        pieces = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    total = len(pieces)
+    frames = [
+        serializer.dumps({"id": msg_id, "type": "chunk", "seq": seq, "total": total,
+                          "encoding": encoding, "data": piece})
+        for seq, piece in enumerate(pieces)
+    ]
+    frames.append(serializer.dumps({"id": msg_id, "type": "chunk_end", "total": total,
+                              "bytes": len(raw), "sha256": hashlib.sha256(raw).hexdigest()}))
+    return frames
+
+
+def join_frames(frames: List[Dict[str, Any]]) -> Any:
+    """split_frames의 역변환 (수신 측 참고 구현, 테스트용)"""
+    end = frames[-1]
+    chunks = sorted((f for f in frames if f.get("type") == "chunk"), key=lambda f: f["seq"])
+    if len(chunks) != end["total"]:
+        raise ValueError("missing chunks")
+    raw = b"".join(
+        zlib.decompress(base64.b64decode(c["data"])) if c["encoding"] == "zlib+base64"
+        else c["data"].encode("utf-8")
+        for c in chunks
+    )
+    if hashlib.sha256(raw).hexdigest() != end["sha256"]:
+        raise ValueError("checksum mismatch")
+    return serializer.loads(raw)
+
+
+class OutboundBuffer:
+
+    def __init__(self, max_messages: int = OUTBOUND_MAX_MESSAGES, max_bytes: int = OUTBOUND_MAX_BYTES):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        # 항목 하나 = 메시지 하나의 프레임 목록 (chunk 분할된 결과는 통째로 재전송)
+        self._queue: Deque[List[str]] = deque()
+        self._bytes = 0
+        self.buffered = 0
+        self.dropped = 0
+        self.replayed = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def push(self, frames: Union[str, List[str]]):
+        """전송 실패/미연결 메시지 보관"""
+        if isinstance(frames, str):
+            frames = [frames]
+        size = sum(len(f) for f in frames)
+        while self._queue and (len(self._queue) >= self.max_messages or self._bytes + size > self.max_bytes):
+            self._bytes -= sum(len(f) for f in self._queue.popleft())
+            self.dropped += 1
+            logger.warning("[RelayLink] outbound buffer full, dropped oldest message")
+        self._queue.append(frames)
+        self._bytes += size
+        self.buffered += 1
+
+    async def flush(self, send: Callable[[str], Awaitable[Any]]) -> int:
+        """보관된 메시지를 순서대로 재전송. 실패하면 남은 메시지는 그대로 유지"""
+        sent = 0
+        while self._queue:
+            frames = self._queue[0]
+            for frame in frames:
+                await send(frame)  # 예외 시 현재 메시지는 큐 맨 앞에 남음 (수신 측은 seq로 중복 처리)
+            self._queue.popleft()
+            self._bytes -= sum(len(f) for f in frames)
+            sent += 1
+        self.replayed += sent
+        if sent:
+            logger.info(f"[RelayLink] replayed {sent} buffered messages")
+        return sent
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._queue),
+            "pending_bytes": self._bytes,
+            "buffered": self.buffered,
+            "dropped": self.dropped,
+            "replayed": self.replayed,
+        }
+
+
+class Backoff:
+    """equal jitter: 다음 대기 = uniform(c/2, c), c = min(max, base * 2^attempt)"""
+
+    def __init__(self, base: float = BACKOFF_BASE, maximum: float = BACKOFF_MAX):
+        self.base = base
+        self.maximum = maximum
+        self.attempt = 0
+
+    def next_delay(self) -> float:
+        ceiling = min(self.maximum, self.base * (2 ** self.attempt))
+        self.attempt = min(self.attempt + 1, 32)  # 오버플로 방지
+        return random.uniform(ceiling / 2, ceiling)
+
+    def reset(self):
+        self.attempt = 0
@@ -2,10 +2,16 @@
 import logging
 import asyncio
 import time
-from typing import Dict, Any
+from .executor import executor
+from .cancellation import ToolCancelled, ToolTimeout
+from .schema_validator import ToolArgumentError
+from .jobs import jobs, parse_status_params
+from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger("RPC-Engine")
 
+BATCH_CONCURRENCY = 8  # 배치 요청 안에서 동시에 실행할 최대 개수
+
 # -------------------------------------------------------------
 # JSON-RPC 표준 응답 생성기
 # -------------------------------------------------------------
@@ -16,29 +22,28 @@ def rpc_success(rpc_id, result):
         "result": {"content": [{"type": "text", "text": str(result)}]}
     }
 
-def rpc_error(rpc_id, code, message):
+def rpc_error(rpc_id, code, message, data=None):
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
     return {
         "jsonrpc": "2.0",
         "id": rpc_id,
-        "error": {"code": code, "message": message}
+        "error": error
     }
 
+# 서버 정의 에러 코드 (-32000 ~ -32099)
+ERROR_TOOL_TIMEOUT = -32001
+ERROR_REQUEST_CANCELLED = -32800
+
 
 # -------------------------------------------------------------
-# Tool 실행 Wrapper (sync/async 자동 처리 + 예외 핸들링)
+# Tool 실행 Wrapper (async는 루프에서, sync는 스레드/프로세스 풀에서)
 # -------------------------------------------------------------
-async def execute_tool(tool: Dict[str, Any], args: Dict[str, Any]):
-    handler = tool.get("handler")
-
-    if not handler:
-        raise Exception("Tool has no handler()")
-
-    # async
-    if asyncio.iscoroutinefunction(handler):
-        return await handler(args)
-
-    # sync
-    return handler(args)
+async def execute_tool(tool: Dict[str, Any], args: Dict[str, Any], name: str = "", rpc_id=None):
+    # 취소용 키는 릴레이 요청 id와 겹치지 않도록 구분
+    request_id = ("rpc", rpc_id) if rpc_id is not None else None
+    return await executor.run(tool, args, name=name, request_id=request_id)
 
 
 # -------------------------------------------------------------
@@ -89,13 +94,16 @@ async def handle_rpc(body: Dict[str, Any], registry: Dict[str, Any]):
     if method == "tools/list":
         logger.info("[RPC] tools/list received")
 
-        tools_list = []
-        for name, info in registry.items():
-            tools_list.append({
-                "name": name,
-                "description": info.get("description", ""),
-                "inputSchema": info.get("inputSchema", {})
-            })
+        if hasattr(registry, "listing"):
+            tools_list = registry.listing()  # snapshot에 캐시된 목록
+        else:
+            tools_list = []
+            for name, info in registry.items():
+                tools_list.append({
+                    "name": name,
+                    "description": info.get("description", ""),
+                    "inputSchema": info.get("inputSchema", {})
+                })
 
         return {
             "jsonrpc": "2.0",
@@ -104,7 +112,45 @@ async def handle_rpc(body: Dict[str, Any], registry: Dict[str, Any]):
         }
 
     # ---------------------------------------------------------
-    # 3) tools/call
+    # 3) 취소 (MCP notifications/cancelled, LSP 스타일 $/cancelRequest)
+    # ---------------------------------------------------------
+    if method in ("notifications/cancelled", "$/cancelRequest"):
+        target = params.get("requestId", params.get("id"))
+        found = executor.cancel(("rpc", target))
+        logger.info(f"[RPC] cancel {target} → {'cancelled' if found else 'not running'}")
+        return {"jsonrpc": "2.0", "id": rpc_id, "result": {"cancelled": found}}
+
+    # ---------------------------------------------------------
+    # 4) 백그라운드 job (jobs/submit → jobs/status 로 poll, wait로 long-poll)
+    # ---------------------------------------------------------
+    if method == "jobs/submit":
+        tool_name = params.get("name")
+        if tool_name not in registry:
+            return rpc_error(rpc_id, -32601, f"Tool not found: {tool_name}")
+        try:
+            job = jobs.submit(tool_name, registry[tool_name], params.get("arguments", {}), params.get("timeout"))
+        except ValueError as e:
+            return rpc_error(rpc_id, -32602, str(e))
+        return {"jsonrpc": "2.0", "id": rpc_id, "result": {"jobId": job.id, "status": job.status}}
+
+    if method == "jobs/status":
+        try:
+            since, wait = parse_status_params(params.get("since", 0), params.get("wait", 0))
+        except ValueError as e:
+            return rpc_error(rpc_id, -32602, str(e))
+        snapshot = await jobs.status(params.get("jobId"), since, wait)
+        if snapshot is None:
+            return rpc_error(rpc_id, -32602, f"Unknown job: {params.get('jobId')}")
+        return {"jsonrpc": "2.0", "id": rpc_id, "result": snapshot}
+
+    if method == "jobs/cancel":
+        return {"jsonrpc": "2.0", "id": rpc_id, "result": {"cancelled": jobs.cancel(params.get("jobId"))}}
+
+    if method == "jobs/list":
+        return {"jsonrpc": "2.0", "id": rpc_id, "result": {"jobs": jobs.list()}}
+
+    # ---------------------------------------------------------
+    # 5) tools/call
     # ---------------------------------------------------------
     if method == "tools/call":
         tool_name = params.get("name")
@@ -122,12 +168,21 @@ async def handle_rpc(body: Dict[str, Any], registry: Dict[str, Any]):
 
         try:
             started = time.time()
-            result = await execute_tool(tool, args)
+            result = await execute_tool(tool, args, tool_name, rpc_id)
             duration = time.time() - started
 
             logger.info(f"[RPC] Tool '{tool_name}' finished in {duration:.3f}s")
             return rpc_success(rpc_id, result)
 
+        except ToolArgumentError as e:
+            return rpc_error(rpc_id, -32602, str(e), e.to_dict())
+
+        except ToolTimeout as e:
+            return rpc_error(rpc_id, ERROR_TOOL_TIMEOUT, str(e), e.to_dict())
+
+        except ToolCancelled as e:
+            return rpc_error(rpc_id, ERROR_REQUEST_CANCELLED, str(e), e.to_dict())
+
         except Exception as e:
             logger.error(f"[RPC] Tool execution failed: {e}")
             return rpc_error(rpc_id, -32603, str(e))
@@ -136,3 +191,46 @@ async def handle_rpc(body: Dict[str, Any], registry: Dict[str, Any]):
     # Unknown Method
     # ---------------------------------------------------------
     return rpc_error(rpc_id, -32601, f"Unknown method: {method}")
+
+
+# -------------------------------------------------------------
+# Batch (JSON-RPC 2.0 배열 요청)
+# - 상한 안에서 동시 실행, 응답은 요청 순서대로 배열 반환
+# - id가 없는 요청(notification)은 실행만 하고 응답에서 제외
+# -------------------------------------------------------------
+async def handle_rpc_batch(batch: List[Any], registry: Dict[str, Any],
+                           max_concurrency: int = BATCH_CONCURRENCY) -> Optional[List[Dict[str, Any]]]:
+    if not batch:
+        return rpc_error(None, -32600, "Invalid Request: empty batch")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(item):
+        if not isinstance(item, dict):
+            return rpc_error(None, -32600, "Invalid Request")
+        async with semaphore:
+            try:
+                response = await handle_rpc(item, registry)
+            except Exception as e:
+                logger.error(f"[RPC] batch item failed: {e}")
+                response = rpc_error(item.get("id"), -32603, str(e))
+        if "id" not in item:
+            return None
+        return response
+
+    started = time.time()
+    responses = await asyncio.gather(*(run_one(item) for item in batch))
+    logger.info(f"[RPC] batch of {len(batch)} finished in {time.time() - started:.3f}s")
+
+    responses = [r for r in responses if r is not None]
+    # 전부 notification이면 응답 없음
+    return responses or None
+
+
+async def handle_rpc_request(body: Any, registry: Dict[str, Any]):
+    """단일 요청(dict) 또는 배치(list) 처리. 반환값 None이면 응답 본문 없음"""
+    if isinstance(body, list):
+        return await handle_rpc_batch(body, registry)
+    if not isinstance(body, dict):
+        return rpc_error(None, -32600, "Invalid Request")
+    return await handle_rpc(body, registry)
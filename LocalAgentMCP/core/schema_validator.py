@@ -0,0 +1,232 @@
+# schema_validator.py
+# -------------------------------------------------------------
+# 툴 인자 검증 (inputSchema → 검증 함수로 미리 컴파일)
+# - 등록 시(tool_registry.compile_tool) 한 번만 컴파일 → 호출마다 스키마를 해석하지 않음
+#   검사할 것이 없는 노드는 컴파일 단계에서 제거 (빈 스키마 → 검증 생략)
+# - 지원 키워드: type, enum, properties, required, items,
+#   minimum/maximum, minLength/maxLength, minItems/maxItems, pattern, anyOf
+#   (그 외 키워드는 무시. additionalProperties는 기본값(true) 그대로 → 여분 인자 허용)
+# - 오류는 LLM이 바로 고칠 수 있는 짧은 문장 목록 ("'items[0].path': expected string, got integer")
+#   경로는 (부모, 키) 쌍으로만 전달하고 문자열은 오류가 났을 때만 만듦
+# -------------------------------------------------------------
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MAX_ERRORS = 5
+
+# path: None(최상위) 또는 (부모 path, 키)
+Path = Optional[Tuple[Any, Any]]
+# (value, path, errors) → False면 타입 불일치 (같은 노드의 나머지 검사 생략)
+Check = Callable[[Any, Path, List[str]], Optional[bool]]
+Validator = Callable[[Any], List[str]]
+
+
+class ToolArgumentError(Exception):
+    """inputSchema 위반 (구조화된 결과는 to_dict)"""
+
+    def __init__(self, tool: str, errors: List[str]):
+        super().__init__(f"Invalid arguments for '{tool}': " + "; ".join(errors))
+        self.tool = tool
+        self.errors = errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"status": "invalid_arguments", "tool": self.tool, "errors": self.errors}
+
+
+def _json_type(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, (list, tuple)):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def _is_integer(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+_TYPE_TESTS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": _is_integer,
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "array": lambda v: isinstance(v, (list, tuple)),
+    "object": lambda v: isinstance(v, dict),
+    "null": lambda v: v is None,
+}
+
+
+def _format(path: Path) -> str:
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(key)
+    out = ""
+    for key in reversed(keys):
+        out += f"[{key}]" if isinstance(key, int) else (f".{key}" if out else key)
+    return out
+
+
+def _label(path: Path) -> str:
+    return f"'{_format(path)}'" if path is not None else "arguments"
+
+
+def _type_check(types: List[str]) -> Optional[Check]:
+    tests = [_TYPE_TESTS[t] for t in types if t in _TYPE_TESTS]
+    if not tests:
+        return None
+    expected = " or ".join(types)
+    if len(tests) == 1:
+        test = tests[0]
+
+        def check(value, path, errors):
+            if not test(value):
+                errors.append(f"{_label(path)}: expected {expected}, got {_json_type(value)}")
+                return False
+        return check
+
+    def check_any(value, path, errors):
+        for test in tests:
+            if test(value):
+                return None
+        errors.append(f"{_label(path)}: expected {expected}, got {_json_type(value)}")
+        return False
+    return check_any
+
+
+def _compile(schema: Any) -> Optional[Check]:
+    if not isinstance(schema, dict) or not schema:
+        return None
+    checks: List[Check] = []
+
+    types = schema.get("type")
+    if isinstance(types, str):
+        types = [types]
+    types = types if isinstance(types, list) else []
+    type_check = _type_check(types)
+    if type_check is not None:
+        checks.append(type_check)
+
+    enum = schema.get("enum")
+    if isinstance(enum, list) and enum:
+        allowed = enum
+        shown = ", ".join(repr(v) for v in enum[:10])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{_label(path)}: must be one of {shown}")
+        checks.append(check_enum)
+
+    # ---------------- object ----------------
+    required = [k for k in schema.get("required", []) or [] if isinstance(k, str)]
+    properties = schema.get("properties") if isinstance(schema.get("properties"), dict) else {}
+    props = [(k, c) for k, c in ((k, _compile(s)) for k, s in properties.items()) if c is not None]
+    if required or props:
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return None  # 타입 검사는 type 키워드 담당
+            for key in required:
+                if key not in value:
+                    errors.append(f"missing required argument '{_format((path, key))}'")
+            for key, sub in props:
+                if key in value:
+                    sub(value[key], (path, key), errors)
+        checks.append(check_object)
+
+    # ---------------- array ----------------
+    items = _compile(schema.get("items"))
+    min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+    if items is not None or min_items is not None or max_items is not None:
+        def check_array(value, path, errors):
+            if not isinstance(value, (list, tuple)):
+                return None
+            if min_items is not None and len(value) < min_items:
+                errors.append(f"{_label(path)}: needs at least {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                errors.append(f"{_label(path)}: allows at most {max_items} items")
+            if items is not None:
+                for i, item in enumerate(value):
+                    items(item, (path, i), errors)
+                    if len(errors) >= MAX_ERRORS:
+                        break
+        checks.append(check_array)
+
+    # ---------------- string ----------------
+    min_len, max_len = schema.get("minLength"), schema.get("maxLength")
+    pattern = re.compile(schema["pattern"]) if isinstance(schema.get("pattern"), str) else None
+    if min_len is not None or max_len is not None or pattern is not None:
+        def check_string(value, path, errors):
+            if not isinstance(value, str):
+                return None
+            if min_len is not None and len(value) < min_len:
+                errors.append(f"{_label(path)}: must be at least {min_len} characters")
+            if max_len is not None and len(value) > max_len:
+                errors.append(f"{_label(path)}: must be at most {max_len} characters")
+            if pattern is not None and not pattern.search(value):
+                errors.append(f"{_label(path)}: must match {pattern.pattern!r}")
+        checks.append(check_string)
+
+    # ---------------- number ----------------
+    minimum, maximum = schema.get("minimum"), schema.get("maximum")
+    if minimum is not None or maximum is not None:
+        def check_number(value, path, errors):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return None
+            if minimum is not None and value < minimum:
+                errors.append(f"{_label(path)}: must be >= {minimum}")
+            if maximum is not None and value > maximum:
+                errors.append(f"{_label(path)}: must be <= {maximum}")
+        checks.append(check_number)
+
+    # ---------------- anyOf ----------------
+    any_of = [c for c in (_compile(s) for s in schema.get("anyOf", []) or []) if c is not None]
+    if any_of:
+        def check_any_of(value, path, errors):
+            first: List[str] = []
+            for sub in any_of:
+                sub_errors: List[str] = []
+                sub(value, path, sub_errors)
+                if not sub_errors:
+                    return None
+                first = first or sub_errors
+            errors.append(f"{_label(path)}: matches none of the allowed forms ({first[0]})")
+        checks.append(check_any_of)
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path, errors):
+        for check in checks:
+            if check(value, path, errors) is False:
+                return False
+    return check_all
+
+
+def compile_validator(schema: Any) -> Optional[Validator]:
+    """inputSchema → validate(args) (오류 문장 목록, 통과하면 빈 목록). 검사할 것이 없으면 None"""
+    try:
+        check = _compile(schema)
+    except (re.error, TypeError) as e:
+        raise ValueError(f"invalid inputSchema: {e}") from e
+    if check is None:
+        return None
+
+    def validate(args: Any) -> List[str]:
+        errors: List[str] = []
+        check({} if args is None else args, None, errors)
+        return errors[:MAX_ERRORS]
+    return validate
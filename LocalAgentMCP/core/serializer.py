@@ -0,0 +1,82 @@
+# serializer.py
+# -------------------------------------------------------------
+# JSON 직렬화 계층
+# - orjson이 있으면 사용 (stdlib json 대비 수 배 빠름), 없으면 stdlib
+#   LOCAL_AGENT_JSON=stdlib 로 강제 가능 (비교/디버깅용)
+# - 출력 형식 통일: UTF-8 그대로(ensure_ascii=False), 공백 없는 구분자
+# - orjson이 처리 못 하는 값(큰 정수 등)은 stdlib로 재시도
+# - Encoded: 한 번 인코딩한 bytes/str을 재사용 (같은 페이로드 재직렬화 방지)
+# -------------------------------------------------------------
+import json
+import os
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+if os.environ.get("LOCAL_AGENT_JSON", "auto") == "stdlib":
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "stdlib"
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys)
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            pass
+    return _stdlib_dumps(obj, sort_keys).encode("utf-8")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    if orjson is not None:
+        return dumps_bytes(obj, sort_keys).decode("utf-8")
+    return _stdlib_dumps(obj, sort_keys)
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class Encoded:
+    """직렬화 결과 캐시: bytes(HTTP 본문/체크섬)와 str(WebSocket 텍스트 프레임) 각각 한 번만 생성"""
+
+    __slots__ = ("_bytes", "_text")
+
+    def __init__(self, obj: Any = None, data: Optional[bytes] = None, text: Optional[str] = None):
+        self._bytes = data
+        self._text = text
+        if data is None and text is None:
+            self._bytes = dumps_bytes(obj)
+
+    @property
+    def bytes(self) -> bytes:
+        if self._bytes is None:
+            self._bytes = self._text.encode("utf-8")
+        return self._bytes
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._bytes.decode("utf-8")
+        return self._text
+
+    def __len__(self):
+        return len(self.bytes)
+
+
+def request_body(payload: Any) -> Dict[str, Any]:
+    """httpx 요청 인자: client.post(url, **request_body(payload)) — json= 대신 빠른 인코더 사용"""
+    return {"content": dumps_bytes(payload), "headers": JSON_HEADERS}
@@ -0,0 +1,128 @@
+# sessions.py
+# -------------------------------------------------------------
+# 세션 단위 대화 관리
+# - (session_id, character) 별로 독립된 Conversation
+# - asyncio.Lock으로 같은 대화에 대한 동시 턴 직렬화
+# - LRU 최대 개수 + 유휴 TTL로 메모리 상한 유지 (원문은 HistoryStore에 남음)
+# -------------------------------------------------------------
+import asyncio
+import logging
+import re
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("Sessions")
+
+MAX_CONVERSATIONS = 256
+IDLE_TTL_SECONDS = 30 * 60
+
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+Key = Tuple[str, str]
+ConversationFactory = Callable[[str, str, int], Awaitable[Any]]
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def normalize_session_id(raw: Optional[str]) -> str:
+    """클라이언트가 보낸 세션 id 검증. 형식이 틀리면 새로 발급"""
+    if raw and _SESSION_ID_RE.match(raw):
+        return raw
+    return new_session_id()
+
+
+class _Entry:
+    __slots__ = ("conv", "lock", "last_used", "users")
+
+    def __init__(self, conv):
+        self.conv = conv
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self.users = 0
+
+
+class SessionManager:
+
+    def __init__(self, factory: ConversationFactory,
+                 max_entries: int = MAX_CONVERSATIONS, ttl: float = IDLE_TTL_SECONDS):
+        self.factory = factory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+
+    async def _entry(self, session_id: str, character: str, budget: int) -> _Entry:
+        key = (session_id, character)
+        entry = self._entries.get(key)
+        if entry is None:
+            conv = await self.factory(session_id, character, budget)
+            # 생성 중 다른 코루틴이 먼저 등록했으면 그쪽을 사용
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(conv)
+                self._entries[key] = entry
+                self.created += 1
+        self._entries.move_to_end(key)
+        entry.last_used = time.monotonic()
+        self.sweep(keep=key)
+        return entry
+
+    @asynccontextmanager
+    async def acquire(self, session_id: str, character: str, budget: int):
+        """대화 한 턴 동안 잠금 + 사용 중 표시 (사용 중에는 축출되지 않음)"""
+        entry = await self._entry(session_id, character, budget)
+        entry.users += 1
+        try:
+            async with entry.lock:
+                entry.conv.budget_tokens = budget  # 캐릭터 파일 핫 에디트 반영
+                yield entry.conv
+        finally:
+            entry.users -= 1
+            entry.last_used = time.monotonic()
+
+    def peek(self, session_id: str, character: str):
+        entry = self._entries.get((session_id, character))
+        return entry.conv if entry else None
+
+    def sweep(self, keep: Optional[Key] = None) -> int:
+        """TTL 지난 유휴 대화 + LRU 초과분 축출 (keep은 방금 꺼낸 항목)"""
+        now = time.monotonic()
+        removed = 0
+        for key in list(self._entries.keys()):
+            entry = self._entries[key]
+            over_capacity = len(self._entries) > self.max_entries
+            expired = now - entry.last_used > self.ttl
+            if not (over_capacity or expired):
+                # OrderedDict는 오래된 순 → 이후 항목은 더 최근
+                break
+            if entry.users or key == keep:
+                continue
+            del self._entries[key]
+            removed += 1
+        if removed:
+            self.evicted += removed
+            logger.info(f"[Sessions] evicted {removed} idle conversations")
+        return removed
+
+    async def run_sweeper(self, interval: float = 60):
+        """주기적으로 유휴 대화 정리 (startup에서 태스크로 실행)"""
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "conversations": len(self._entries),
+            "sessions": len({s for s, _ in self._entries}),
+            "active": sum(1 for e in self._entries.values() if e.users),
+            "created": self.created,
+            "evicted": self.evicted,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+        }
@@ -0,0 +1,130 @@
+# tool_catalog.py
+# -------------------------------------------------------------
+# LLM에 노출할 툴 카탈로그 (Ollama function-calling 형식)
+# - 레지스트리에서 한 번만 변환해 두고, 레지스트리가 바뀔 때만 재생성
+# - 선택적으로 메시지와 관련 있는 top-k 툴만 노출 (키워드 매칭)
+# -------------------------------------------------------------
+import logging
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("ToolCatalog")
+
+_WORD_RE = re.compile(r"[A-Za-z]+|[0-9]+|[가-힣]+")
+
+# 한국어 요청 → 영어 툴 설명 매칭용 별칭
+KEYWORD_ALIASES = {
+    "파일": ["file", "resource", "fs"],
+    "읽": ["read", "fetch"],
+    "써": ["write", "update"],
+    "쓰기": ["write", "update"],
+    "저장": ["save", "write"],
+    "폴더": ["directory", "dir", "folder", "list"],
+    "목록": ["list"],
+    "검색": ["search", "web"],
+    "날씨": ["search", "web"],
+    "뉴스": ["search", "web"],
+    "최신": ["search", "web"],
+    "실행": ["run", "shell", "command"],
+    "명령": ["command", "shell", "run"],
+    "프로세스": ["process", "ps"],
+    "유니티": ["unity"],
+    "깃허브": ["github"],
+    "모델": ["model", "ai"],
+    "생성": ["generate", "create"],
+    "기억": ["soul", "memory", "save"],
+    "환생": ["resurrect"],
+    "워크스페이스": ["workspace"],
+    "백업": ["backup", "workspace"],
+}
+
+
+def _terms(text: str) -> List[str]:
+    words = []
+    for w in _WORD_RE.findall(text or ""):
+        w = w.lower()
+        words.append(w)
+        for key, aliases in KEYWORD_ALIASES.items():
+            if key in w:
+                words.extend(aliases)
+    return words
+
+
+def to_ollama_tool(name: str, info: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": info.get("description", ""),
+            "parameters": info.get("inputSchema", {})
+        }
+    }
+
+
+class ToolCatalog:
+
+    def __init__(self, registry: Dict[str, Dict[str, Any]]):
+        self.tools: List[Dict[str, Any]] = []
+        self._signature: Tuple = ()
+        self._terms: List[set] = []
+        self._idf: Dict[str, float] = {}
+        self.builds = 0
+        self.refresh(registry)
+
+    @staticmethod
+    def _signature_of(registry) -> Tuple:
+        # 툴 정의 객체가 교체되면 id가 바뀌므로 이름+id로 변경 감지
+        return tuple((name, id(info)) for name, info in registry.items())
+
+    def refresh(self, registry: Dict[str, Dict[str, Any]]):
+        """레지스트리 → Ollama 툴 목록 + 검색 인덱스 재생성"""
+        self.tools = [to_ollama_tool(name, info) for name, info in registry.items()]
+        self._terms = []
+        for name, info in registry.items():
+            text = " ".join([
+                name.replace(".", " ").replace("_", " "),
+                info.get("description", ""),
+                " ".join((info.get("inputSchema", {}) or {}).get("properties", {}).keys()),
+            ])
+            self._terms.append(set(_terms(text)))
+
+        n = max(1, len(self._terms))
+        df: Dict[str, int] = {}
+        for terms in self._terms:
+            for t in terms:
+                df[t] = df.get(t, 0) + 1
+        self._idf = {t: math.log(1 + n / c) for t, c in df.items()}
+
+        self._signature = self._signature_of(registry)
+        self.builds += 1
+        logger.info(f"[ToolCatalog] built catalog with {len(self.tools)} tools")
+
+    def ensure_fresh(self, registry: Dict[str, Dict[str, Any]]):
+        """레지스트리가 바뀐 경우에만 재생성"""
+        if self._signature_of(registry) != self._signature:
+            self.refresh(registry)
+
+    def select(self, message: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        메시지와 관련 있는 상위 top_k 툴.
+        top_k가 없거나 아무 툴도 매칭되지 않으면 전체 카탈로그 반환 (안전한 기본값).
+        """
+        if not top_k or top_k >= len(self.tools):
+            return self.tools
+
+        query = set(_terms(message))
+        scored = []
+        for idx, terms in enumerate(self._terms):
+            score = sum(self._idf.get(t, 0.0) for t in query & terms)
+            if score > 0:
+                scored.append((score, idx))
+
+        if not scored:
+            return self.tools
+
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return [self.tools[idx] for _, idx in scored[:top_k]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tools": len(self.tools), "builds": self.builds}
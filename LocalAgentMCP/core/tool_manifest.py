@@ -0,0 +1,360 @@
+# tool_manifest.py
+# -------------------------------------------------------------
+# Manifest 기반 지연(lazy) 툴 로딩
+# - 툴 모듈의 이름/설명/스키마 등 선언 정보를 manifest(JSON)에 캐시
+#   (<툴 폴더>/__pycache__/tool_manifest.json, 소스 mtime/size가 바뀌면 해당 모듈만 무효화)
+# - 레지스트리는 manifest로 구성, 모듈 import는 툴이 처음 호출될 때
+#   → duckduckgo_search, psutil, win32 등 무거운 의존성을 시작 시점에 불러오지 않음
+# - 모듈별 import 시간 측정 (시작 시 import한 모듈 + 첫 호출 시 import)
+# - 핫 리로드: 바뀐 모듈만 새 모듈 객체로 import. sys.modules 교체는 레지스트리가
+#   snapshot을 바꾸는 시점에만 (install_reloaded). 실패하면 기존 모듈/툴 유지
+# - handler는 snapshot을 만들 때의 모듈 객체에 고정 (_ModuleRef)
+#   → 이전 snapshot으로 실행 중인 호출은 끝까지 이전 코드 + 이전 검증/타임아웃 사용
+# - 선언 방식 3가지를 TOOL_DEFINITIONS 형태로 통일 (tool_definitions)
+#     · TOOL_DEFINITIONS = {"name": {...}}
+#     · TOOL = {"name": "...", ...}                 (모듈당 툴 하나)
+#     · MCP_TOOLS = {"name": func} + INPUT_SCHEMAS   (func(**kwargs), 설명은 docstring)
+#   같은 이름의 툴이 여러 모듈에 있으면 선언 방식 우선순위로 결정
+#     TOOL_DEFINITIONS > TOOL > MCP_TOOLS (간이 선언이 정식 선언을 가리지 않도록)
+#   우선순위가 같으면 파일 이름순으로 먼저 나온 쪽 유지 + error 로그
+# -------------------------------------------------------------
+import asyncio
+import functools
+import importlib
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("ToolManifest")
+
+MANIFEST_VERSION = 3
+
+# 선언 방식 → 우선순위 (작을수록 우선)
+STYLE_PRIORITY = {"TOOL_DEFINITIONS": 0, "TOOL": 1, "MCP_TOOLS": 2}
+MANIFEST_NAME = "tool_manifest.json"
+
+# 모듈별 import 기록: {"tools.file_tools": {"import_ms": 12.3, "when": "startup" | "first_call", ...}}
+IMPORT_STATS: Dict[str, Dict[str, Any]] = {}
+
+_import_lock = threading.Lock()
+
+# 리로드로 새로 import했지만 아직 sys.modules에 반영하지 않은 모듈 (install_reloaded 대기)
+_pending: Dict[str, Any] = {}
+
+
+def _source_stamp(path: str) -> Dict[str, int]:
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _declarative(tool_data: Dict[str, Any]) -> Dict[str, Any]:
+    """manifest에 저장할 선언 정보 (handler 등 JSON으로 못 바꾸는 값 제외)"""
+    out = {}
+    for key, value in tool_data.items():
+        if key == "handler":
+            continue
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        out[key] = value
+    return out
+
+
+def _call_with_kwargs(func: Callable, args):
+    return func(**(args or {}))
+
+
+def _kwargs_adapter(func: Callable) -> Callable:
+    """func(**kwargs) 형태 → handler(args) 형태"""
+    if asyncio.iscoroutinefunction(func):
+        async def handler(args):
+            return await func(**(args or {}))
+        handler.__qualname__ = getattr(func, "__qualname__", "handler")
+        return handler
+    return functools.partial(_call_with_kwargs, func)
+
+
+def declaration_style(module) -> Optional[str]:
+    """모듈이 쓰는 선언 방식 (STYLE_PRIORITY 키). 없으면 None"""
+    if getattr(module, "TOOL_DEFINITIONS", None) is not None:
+        return "TOOL_DEFINITIONS"
+    tool = getattr(module, "TOOL", None)
+    if isinstance(tool, dict) and tool.get("name"):
+        return "TOOL"
+    if isinstance(getattr(module, "MCP_TOOLS", None), dict):
+        return "MCP_TOOLS"
+    return None
+
+
+def _normalize(module) -> Optional[Dict[str, Any]]:
+    style = declaration_style(module)
+    if style == "TOOL_DEFINITIONS":
+        return module.TOOL_DEFINITIONS
+
+    if style == "TOOL":
+        tool = module.TOOL
+        return {tool["name"]: {k: v for k, v in tool.items() if k != "name"}}
+
+    if style == "MCP_TOOLS":
+        funcs = module.MCP_TOOLS
+        schemas = getattr(module, "INPUT_SCHEMAS", None) or {}
+        return {
+            name: {
+                "description": (inspect.getdoc(func) or "").split("\n\n")[0].strip(),
+                "inputSchema": schemas.get(name, {}),
+                "handler": _kwargs_adapter(func),
+            }
+            for name, func in funcs.items()
+        }
+    return None
+
+
+def tool_definitions(module) -> Optional[Dict[str, Any]]:
+    """모듈의 툴 선언 (TOOL_DEFINITIONS 형태). 툴이 없으면 None. 모듈 객체에 캐시"""
+    cached = module.__dict__.get("__tool_definitions__")
+    if cached is None:
+        cached = _normalize(module)
+        if cached is not None:
+            module.__tool_definitions__ = cached
+    return cached
+
+
+def _fresh_import(module_path: str, file_path: str):
+    """sys.modules를 건드리지 않고 새 모듈 객체 생성 (검증 후 _install로 교체)"""
+    spec = importlib.util.spec_from_file_location(module_path, file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _install(module_path: str, module):
+    sys.modules[module_path] = module
+    package, _, name = module_path.rpartition(".")
+    if package in sys.modules:
+        setattr(sys.modules[package], name, module)
+
+
+def install_reloaded() -> int:
+    """리로드한 모듈을 sys.modules에 반영. 레지스트리가 snapshot을 교체한 직후 호출"""
+    with _import_lock:
+        modules = dict(_pending)
+        _pending.clear()
+        for module_path, module in modules.items():
+            _install(module_path, module)
+    return len(modules)
+
+
+def discard_reloaded():
+    """snapshot 교체가 실패했을 때: 리로드한 모듈을 반영하지 않고 버림 (기존 모듈 유지)"""
+    with _import_lock:
+        _pending.clear()
+
+
+def _timed_import(module_path: str, reload: bool, when: str, file_path: Optional[str] = None):
+    started = time.perf_counter()
+    if reload and file_path:
+        module = _fresh_import(module_path, file_path)
+    else:
+        module = importlib.import_module(module_path)
+    elapsed = (time.perf_counter() - started) * 1000
+    IMPORT_STATS[module_path] = {"import_ms": round(elapsed, 1), "when": when}
+    return module
+
+
+class _ModuleRef:
+    """handler가 쓰는 모듈 객체. 레지스트리 구성 시 고정, 아직 import 전이면 첫 호출 때 고정"""
+
+    __slots__ = ("module_path", "module")
+
+    def __init__(self, module_path: str, module=None):
+        self.module_path = module_path
+        self.module = module
+
+    def get(self):
+        if self.module is None:
+            with _import_lock:
+                module = sys.modules.get(self.module_path)
+                if module is None:
+                    module = _timed_import(self.module_path, reload=False, when="first_call")
+                    logger.info(f"[ToolManifest] lazily imported {self.module_path} "
+                                f"({IMPORT_STATS[self.module_path]['import_ms']} ms)")
+                self.module = module
+        return self.module
+
+
+def _resolve_handler(ref: _ModuleRef, tool_name: str) -> Callable:
+    """고정된 모듈(필요하면 첫 호출 시 import)의 실제 handler"""
+    return tool_definitions(ref.get())[tool_name]["handler"]
+
+
+class LazyHandler:
+    """동기 handler 대리자. 모듈 참조만 들고 있다가 첫 호출 때 import"""
+
+    __slots__ = ("ref", "tool_name")
+
+    def __init__(self, ref: _ModuleRef, tool_name: str):
+        self.ref = ref
+        self.tool_name = tool_name
+
+    def __call__(self, args):
+        return _resolve_handler(self.ref, self.tool_name)(args)
+
+    def __repr__(self):
+        return f"LazyHandler({self.ref.module_path}:{self.tool_name})"
+
+
+def _lazy_async_handler(ref: _ModuleRef, tool_name: str) -> Callable:
+    # executor가 asyncio.iscoroutinefunction으로 async 여부를 판단하므로 진짜 코루틴 함수로 감쌈
+    async def handler(args):
+        func = _resolve_handler(ref, tool_name)
+        return await func(args)
+    handler.__qualname__ = f"lazy:{ref.module_path}:{tool_name}"
+    return handler
+
+
+def _make_handler(ref: _ModuleRef, tool_name: str, is_async: bool) -> Callable:
+    if is_async:
+        return _lazy_async_handler(ref, tool_name)
+    return LazyHandler(ref, tool_name)
+
+
+def _load_manifest(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data.get("modules", {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def _save_manifest(path: str, modules: Dict[str, Any]):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "modules": modules}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"[ToolManifest] could not write manifest: {e}")
+
+
+def _scan_module(module_path: str, file_path: str, reload: bool) -> Optional[Tuple[Dict[str, Any], Any]]:
+    """모듈을 import해 (manifest 항목, 모듈 객체) 생성. 실패하면 None"""
+    try:
+        module = _timed_import(module_path, reload, "reload" if reload else "startup", file_path)
+    except Exception as e:
+        logger.error(f"[ToolLoader] Failed to import {module_path}: {e}")
+        return None
+
+    tool_defs = tool_definitions(module)
+    if tool_defs is not None and not isinstance(tool_defs, dict):
+        logger.error(f"[ToolLoader] Invalid tool declarations in {module_path}")
+        return None
+    if reload:
+        # 검증 통과 → snapshot 교체 때 sys.modules에 반영 (install_reloaded)
+        with _import_lock:
+            _pending[module_path] = module
+    if tool_defs is None:
+        logger.info(f"[ToolLoader] Skipped {module_path}: no TOOL_DEFINITIONS / TOOL / MCP_TOOLS")
+        return {"tools": {}}, module
+
+    tools = {}
+    for tool_name, tool_data in tool_defs.items():
+        handler = tool_data.get("handler")
+        if not callable(handler):
+            logger.error(f"[ToolLoader] Tool '{tool_name}' missing valid handler()")
+            continue
+        entry = _declarative(tool_data)
+        entry["_async"] = asyncio.iscoroutinefunction(handler)
+        tools[tool_name] = entry
+    return {"style": declaration_style(module), "tools": tools}, module
+
+
+def load_tools_from_dir(package: str, directory: str, reload: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    directory의 *.py 모듈(package.<name>)에서 툴 레지스트리 구성 (선언 방식은 tool_definitions 참고).
+    manifest가 최신인 모듈은 import하지 않고 지연 handler로 등록.
+    reload=True면 이미 import된 모듈 중 소스가 바뀐 것을 새 모듈 객체로 import
+    (sys.modules 반영은 install_reloaded, import/검증 실패 시 이전 manifest 항목 유지).
+    """
+    registry: Dict[str, Dict[str, Any]] = {}
+    manifest_path = os.path.join(directory, "__pycache__", MANIFEST_NAME)
+    cached = _load_manifest(manifest_path)
+    modules: Dict[str, Any] = {}
+    sources: Dict[str, tuple] = {}  # 툴 이름 → (우선순위, 모듈 경로)
+    started = time.perf_counter()
+    imported = 0
+
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".py") or filename.startswith("_"):
+            continue
+        module_name = filename[:-3]
+        module_path = f"{package}.{module_name}"
+        file_path = os.path.join(directory, filename)
+        stamp = _source_stamp(file_path)
+
+        entry = cached.get(module_name)
+        module = sys.modules.get(module_path)  # 아직 import 전이면 None → 첫 호출 때 고정
+        if entry is None or entry.get("stamp") != stamp:
+            scanned = _scan_module(module_path, file_path, reload=reload and module_path in sys.modules)
+            if scanned is None:
+                if entry is None:
+                    continue
+                # 깨진 수정본은 건너뛰고 이전 툴 유지 (stamp가 달라 다음 로드 때 재시도)
+                logger.warning(f"[ToolLoader] Keeping previous tools of {module_path}")
+            else:
+                scanned, module = scanned
+                imported += 1
+                entry = {"stamp": stamp, "import_ms": IMPORT_STATS[module_path]["import_ms"], **scanned}
+        modules[module_name] = entry
+        ref = _ModuleRef(module_path, module)
+
+        # -----------------------------------------
+        # 각 Tool 등록 (handler는 지연 대리자)
+        # -----------------------------------------
+        style = entry.get("style")
+        priority = STYLE_PRIORITY.get(style, len(STYLE_PRIORITY))
+        for tool_name, decl in entry["tools"].items():
+            if tool_name in sources:
+                kept_priority, kept_module = sources[tool_name]
+                if priority >= kept_priority:
+                    log = logger.error if priority == kept_priority else logger.warning
+                    log(f"[ToolLoader] Duplicate tool name: {tool_name} in {module_path} ({style}) "
+                        f"— keeping {kept_module}")
+                    continue
+                logger.warning(f"[ToolLoader] Duplicate tool name: {tool_name} — {module_path} ({style}) "
+                               f"overrides {kept_module}")
+            sources[tool_name] = (priority, module_path)
+            tool_data = {k: v for k, v in decl.items() if k != "_async"}
+            # inputSchema 기본값 보정
+            if not isinstance(tool_data.get("inputSchema", {}), dict):
+                logger.warning(f"[ToolLoader] Fixing invalid inputSchema for {tool_name}")
+                tool_data["inputSchema"] = {}
+            tool_data["handler"] = _make_handler(ref, tool_name, decl.get("_async", False))
+            tool_data["_module"] = module_path
+            registry[tool_name] = tool_data
+
+    if modules != cached:
+        _save_manifest(manifest_path, modules)
+
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.info(f"[ToolLoader] {package}: {len(registry)} tools from {len(modules)} modules "
+                f"({imported} imported, {len(modules) - imported} from manifest) in {elapsed:.1f} ms")
+    for module_name, entry in modules.items():
+        path = f"{package}.{module_name}"
+        if path in IMPORT_STATS and IMPORT_STATS[path]["when"] != "first_call":
+            logger.info(f"[ToolLoader]   import {path}: {IMPORT_STATS[path]['import_ms']} ms")
+    return registry
+
+
+def import_stats() -> Dict[str, Dict[str, Any]]:
+    return dict(IMPORT_STATS)
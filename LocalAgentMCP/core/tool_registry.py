@@ -0,0 +1,115 @@
+# tool_registry.py
+# -------------------------------------------------------------
+# 통합 툴 레지스트리 (agent_server / studio_server 공용)
+# - 로더(tools/ 또는 plugins/)가 만든 레지스트리를 컴파일된 snapshot으로 보관
+#   (선언 방식 3가지는 tool_manifest.tool_definitions에서 이미 통일됨)
+# - 등록 시 한 번만 계산하는 dispatch 정보 (툴 정의의 "_" 내부 키)
+#     · _kind     : async / io                 (executor.classify)
+#     · _timeout  : 초 또는 None(무제한)        (executor.timeout_of)
+#     · _validate : inputSchema를 컴파일한 인자 검증 함수 또는 None (schema_validator)
+#     · _schema   : 릴레이/카탈로그용 공개 항목 직렬화 bytes, _hash: 그 해시
+# - snapshot은 만든 뒤 바꾸지 않음 → 교체는 참조 재바인딩 한 번 (실행 중인 호출은 기존 정의 사용)
+#   handler도 snapshot을 만들 때의 모듈 객체에 고정, 리로드한 모듈은 교체 직후에만 sys.modules에 반영
+# -------------------------------------------------------------
+import hashlib
+import itertools
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from . import serializer
+from .catalog_sync import diff_registries, public_entry
+from .executor import classify, timeout_of
+from .schema_validator import compile_validator
+from .tool_manifest import discard_reloaded, install_reloaded
+
+logger = logging.getLogger("ToolRegistry")
+
+Loader = Callable[[bool], Dict[str, Dict[str, Any]]]
+
+_versions = itertools.count(1)
+
+
+def compile_tool(name: str, info: Dict[str, Any]) -> Dict[str, Any]:
+    """툴 정의 복사본에 dispatch 정보 추가"""
+    tool = dict(info)
+    schema = serializer.dumps_bytes(public_entry(tool), sort_keys=True)
+    tool["_kind"] = classify(tool)
+    tool["_timeout"] = timeout_of(tool)
+    try:
+        tool["_validate"] = compile_validator(tool.get("inputSchema"))
+    except ValueError as e:
+        logger.warning(f"[ToolRegistry] {name}: {e} (validation disabled)")
+        tool["_validate"] = None
+    tool["_schema"] = schema
+    tool["_hash"] = hashlib.sha256(schema).hexdigest()[:16]
+    return tool
+
+
+class RegistrySnapshot(Mapping):
+    """이름 → 컴파일된 툴 정의 (읽기 전용)"""
+
+    def __init__(self, registry: Dict[str, Dict[str, Any]]):
+        self._tools = {name: compile_tool(name, info) for name, info in registry.items()}
+        self.version = next(_versions)
+        self._listing: Optional[List[Dict[str, Any]]] = None
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        return self._tools[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tools)
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def __contains__(self, name) -> bool:
+        return name in self._tools
+
+    def get(self, name, default=None):
+        return self._tools.get(name, default)
+
+    def listing(self) -> List[Dict[str, Any]]:
+        """MCP tools/list 형식 (snapshot마다 한 번만 생성)"""
+        if self._listing is None:
+            self._listing = [{"name": name, **public_entry(info)} for name, info in self._tools.items()]
+        return self._listing
+
+
+class ToolRegistry:
+
+    def __init__(self, loader: Loader):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self.snapshot = RegistrySnapshot({})
+        self.swaps = 0
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot.get(name)
+
+    def load(self, reload: bool = False) -> Dict[str, Any]:
+        """
+        로더 실행 → 컴파일 → snapshot 교체. 추가/변경/삭제된 툴 이름 반환.
+        블로킹 (import 포함) → 이벤트 루프에서는 asyncio.to_thread로 호출.
+        """
+        with self._lock:
+            try:
+                new = RegistrySnapshot(self._loader(reload))
+            except Exception:
+                discard_reloaded()
+                raise
+            delta = diff_registries(self.snapshot, new)
+            self.snapshot = new
+            install_reloaded()
+            self.swaps += 1
+        logger.info(f"[ToolRegistry] v{new.version}: {len(new)} tools "
+                    f"(+{len(delta['added'])} ~{len(delta['changed'])} -{len(delta['removed'])})")
+        return delta
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        kinds: Dict[str, int] = {}
+        for info in snapshot.values():
+            kinds[info["_kind"]] = kinds.get(info["_kind"], 0) + 1
+        return {"tools": len(snapshot), "version": snapshot.version, "swaps": self.swaps, "kinds": kinds}
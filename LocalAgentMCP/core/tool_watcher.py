@@ -0,0 +1,69 @@
+# tool_watcher.py
+# -------------------------------------------------------------
+# 툴 폴더 감시 (tools/, plugins/) → 변경 시 콜백
+# - 외부 의존성 없이 mtime/size 폴링 (파일 수십 개 → 비용 무시 가능)
+# - 에디터가 여러 번 나눠 저장하는 경우를 위해 짧게 debounce
+# - 콜백에서 레지스트리 재구성 + 교체 + 카탈로그 delta 전송
+# -------------------------------------------------------------
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+logger = logging.getLogger("ToolWatcher")
+
+POLL_INTERVAL = 1.0
+DEBOUNCE = 0.3
+
+Stamp = Tuple[int, int]
+OnChange = Callable[[Set[str]], Awaitable[None]]
+
+
+class ToolWatcher:
+
+    def __init__(self, directories: List[str], interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE):
+        self.directories = directories
+        self.interval = interval
+        self.debounce = debounce
+        self.reloads = 0
+
+    def snapshot(self) -> Dict[str, Stamp]:
+        stamps: Dict[str, Stamp] = {}
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            for filename in os.listdir(directory):
+                if not filename.endswith(".py") or filename.startswith("_"):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                stamps[path] = (st.st_mtime_ns, st.st_size)
+        return stamps
+
+    @staticmethod
+    def diff(old: Dict[str, Stamp], new: Dict[str, Stamp]) -> Set[str]:
+        return {p for p in old.keys() | new.keys() if old.get(p) != new.get(p)}
+
+    async def run(self, on_change: OnChange):
+        """startup에서 태스크로 실행"""
+        previous = await asyncio.to_thread(self.snapshot)
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await asyncio.to_thread(self.snapshot)
+            if current == previous:
+                continue
+            await asyncio.sleep(self.debounce)
+            current = await asyncio.to_thread(self.snapshot)
+            changed = self.diff(previous, current)
+            previous = current
+            if not changed:
+                continue
+            logger.info(f"[ToolWatcher] changed: {', '.join(sorted(os.path.basename(p) for p in changed))}")
+            self.reloads += 1
+            try:
+                await on_change(changed)
+            except Exception as e:
+                logger.error(f"[ToolWatcher] reload failed: {e}")
@@ -0,0 +1,189 @@
+# vision.py
+# -------------------------------------------------------------
+# Vision Proxy 파이프라인 (Llava 등)
+# - 한 메시지의 이미지들을 동시 분석 (상한 max_concurrency)
+# - 이미지 내용 해시 기반 캐시: 메모리 LRU + 선택적 디스크 계층
+# - 같은 이미지가 동시에 들어오면 진행 중인 분석에 합류
+# - 큰 이미지는 업로드 전에 CPU에서 축소 (Pillow가 있을 때만, 실패하면 원본 전송)
+# - base64 디코딩/해시/인코딩은 스레드에서 (이벤트 루프의 WebSocket 스트림을 막지 않도록)
+# -------------------------------------------------------------
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .limits import SingleFlight
+
+try:
+    from PIL import Image
+except ImportError:  # 선택 의존성: 없으면 원본 그대로 전송
+    Image = None
+
+logger = logging.getLogger("Vision")
+
+MAX_IMAGE_SIDE = 1344        # llava 입력 해상도 기준, 이보다 크면 축소
+DOWNSCALE_MIN_BYTES = 512 * 1024
+
+Analyzer = Callable[[str, str], Awaitable[Optional[str]]]
+
+
+def _strip_data_url(image_b64: str) -> str:
+    """'data:image/png;base64,....' 형태면 본문만 추출"""
+    if image_b64.startswith("data:") and "," in image_b64:
+        return image_b64.split(",", 1)[1]
+    return image_b64
+
+
+def downscale_image(raw: bytes, max_side: int = MAX_IMAGE_SIDE) -> bytes:
+    """긴 변이 max_side를 넘으면 비율 유지 축소 후 재인코딩 (CPU 작업, 스레드에서 호출)"""
+    if Image is None:
+        return raw
+    with Image.open(io.BytesIO(raw)) as img:
+        if max(img.size) <= max_side:
+            return raw
+        img.thumbnail((max_side, max_side))
+        out = io.BytesIO()
+        if img.mode in ("RGBA", "LA", "P"):
+            img.save(out, format="PNG", optimize=True)
+        else:
+            img.convert("RGB").save(out, format="JPEG", quality=90)
+        return out.getvalue()
+
+
+class VisionPipeline:
+
+    def __init__(self, analyzer: Analyzer, model: str = "llava",
+                 max_concurrency: int = 2, cache_size: int = 128,
+                 disk_dir: Optional[str] = None, max_side: int = MAX_IMAGE_SIDE):
+        self.analyzer = analyzer
+        self.model = model
+        self.max_side = max_side
+        self.cache_size = cache_size
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight = SingleFlight()
+
+        self.hits = 0
+        self.joined = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.downscaled = 0
+
+    # ---------------------------------------------------------
+    # Cache
+    # ---------------------------------------------------------
+    def _key(self, raw: bytes, prompt: str) -> str:
+        h = hashlib.sha256(raw)
+        h.update(f"\0{self.model}\0{prompt}".encode("utf-8"))
+        return h.hexdigest()
+
+    def _remember(self, key: str, value: str):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("result")
+        except Exception:
+            return None
+
+    def _disk_put(self, key: str, value: str):
+        try:
+            with open(self._disk_path(key), "w", encoding="utf-8") as f:
+                json.dump({"model": self.model, "result": value}, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"[Vision] disk cache write failed: {e}")
+
+    # ---------------------------------------------------------
+    # Analyze
+    # ---------------------------------------------------------
+    def _decode(self, image_b64: str, prompt: str) -> Tuple[bytes, str]:
+        """(원본 bytes, 캐시 키). 이미지 하나가 수 MB → 스레드에서 호출"""
+        raw = base64.b64decode(_strip_data_url(image_b64))
+        return raw, self._key(raw, prompt)
+
+    def _prepare(self, raw: bytes) -> Tuple[str, bool]:
+        """업로드용 base64 (큰 이미지는 축소). (base64, 축소 여부). 스레드에서 호출"""
+        data = raw
+        if len(raw) >= DOWNSCALE_MIN_BYTES:
+            try:
+                data = downscale_image(raw, self.max_side)
+            except Exception as e:
+                # Pillow가 열 수 없는 형식 등 → 원본 그대로 분석
+                logger.warning(f"[Vision] downscale failed, sending original: {e}")
+        return base64.b64encode(data).decode("ascii"), data is not raw
+
+    async def analyze(self, image_b64: str, prompt: str) -> Optional[str]:
+        raw, key = await asyncio.to_thread(self._decode, image_b64, prompt)
+
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        # 같은 이미지 분석이 이미 진행 중이면 결과 공유
+        if key in self._inflight:
+            self.joined += 1  # 캐시 적중이 아님: 진행 중인 분석 결과를 기다림
+        return await self._inflight.run(key, lambda: self._analyze_uncached(key, raw, prompt))
+
+    async def _analyze_uncached(self, key: str, raw: bytes, prompt: str) -> Optional[str]:
+        if self.disk_dir:
+            cached = await asyncio.to_thread(self._disk_get, key)
+            if cached is not None:
+                self.disk_hits += 1
+                self._remember(key, cached)
+                return cached
+
+        self.misses += 1
+        async with self._semaphore:
+            payload, downscaled = await asyncio.to_thread(self._prepare, raw)
+            if downscaled:
+                self.downscaled += 1
+            result = await self.analyzer(payload, prompt)
+
+        # 실패(None)는 캐시하지 않음 → 다음 요청에서 재시도
+        if result:
+            self._remember(key, result)
+            if self.disk_dir:
+                await asyncio.to_thread(self._disk_put, key, result)
+        return result
+
+    async def analyze_many(self, images: List[str], prompt: str) -> List[Optional[str]]:
+        """이미지 목록을 동시에 분석, 입력 순서대로 결과 반환 (실패는 None)"""
+        async def safe(img):
+            try:
+                return await self.analyze(img, prompt)
+            except Exception as e:
+                logger.error(f"[Vision] analyze failed: {e}")
+                return None
+        return await asyncio.gather(*(safe(img) for img in images))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "joined": self.joined,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "downscaled": self.downscaled,
+            "inflight": len(self._inflight),
+            "pillow": Image is not None,
+        }
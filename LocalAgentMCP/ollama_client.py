@@ -8,7 +8,10 @@
 import json
 import re
 import time
-import requests
+
+from core.http_pool import get_sync_client
+from core.model_scheduler import scheduler
+from core import serializer
 
 
 class OllamaClient:
@@ -37,7 +40,10 @@ class OllamaClient:
 
         for attempt in range(retry):
             try:
-                resp = requests.post(url, json=payload, timeout=timeout)
+                # 모델 교체 최소화: 같은 모델 요청끼리 묶어서 실행
+                with scheduler.slot_sync(payload.get("model", self.model)) as ticket:
+                    payload["keep_alive"] = ticket.keep_alive
+                    resp = get_sync_client().post(url, **serializer.request_body(payload), timeout=timeout)
 
                 if resp.status_code != 200:
                     raise RuntimeError(
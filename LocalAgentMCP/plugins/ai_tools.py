@@ -11,7 +11,7 @@ from core.ai_registry import AIRegistry
 
 logger = logging.getLogger("AITools")
 
-def call_llm(args):
+async def call_llm(args):
     prompt = args.get("prompt")
     system = args.get("system", "")
     character = args.get("character", "mia")
@@ -19,7 +19,8 @@ def call_llm(args):
     if not prompt:
         return "Error: Prompt is required"
         
-    return AIRegistry.call_llm(prompt, system, character)
+    # 생성 대기 중 스레드를 점유하지 않도록 async로 호출
+    return await AIRegistry.acall_llm(prompt, system, character)
 
 TOOL_DEFINITIONS = {
     "ai.call_llm": {
@@ -33,6 +34,7 @@ TOOL_DEFINITIONS = {
             },
             "required": ["prompt"]
         },
-        "handler": call_llm
+        "handler": call_llm,
+        "timeout": 300  # 모델 교체 대기 + 생성 시간
     }
 }
@@ -1,5 +1,14 @@
-import subprocess
 import logging
+import os
+import sys
+
+# Ensure core is in path
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from core.cancellation import run_subprocess
+from core.jobs import report
 
 logger = logging.getLogger("SystemTools")
 
@@ -10,14 +19,15 @@ def run_command(args):
         return "Error: Command is required"
     
     try:
-        result = subprocess.run(
+        # 툴 타임아웃/취소 시 프로세스 트리째 종료되도록 run_subprocess 사용
+        result = run_subprocess(
             command, 
             shell=True, 
             cwd=cwd, 
-            capture_output=True, 
             text=True,
             encoding='utf-8',
-            errors='replace'
+            errors='replace',
+            on_output=lambda line: report(output=line),  # job 모드면 줄 단위 부분 출력
         )
         return f"STDOUT:\n{result.stdout}\nSTDERR:\n{result.stderr}"
     except Exception as e:
@@ -34,6 +44,7 @@ TOOL_DEFINITIONS = {
             },
             "required": ["command"]
         },
-        "handler": run_command
+        "handler": run_command,
+        "timeout": 300
     }
 }
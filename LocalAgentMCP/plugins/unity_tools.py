@@ -67,6 +67,7 @@ TOOL_DEFINITIONS = {
             },
             "required": ["method"]
         },
-        "handler": send_unity_message
+        "handler": send_unity_message,
+        "max_concurrency": 1  # Named Pipe는 한 번에 하나의 연결만 처리
     }
 }
@@ -4,6 +4,7 @@ import json
 TOOL_DEFINITIONS = {
     "web.search": {
         "handler": lambda args: search_web(args),
+        "timeout": 30,
         "description": "Search the web for real-time information. Use this when you need up-to-date facts, news, or technical documentation.",
         "inputSchema": {
             "type": "object",
@@ -26,15 +26,43 @@ def parse_text_tool_call(content: str):
     return None
 
 import os
+import time
 import asyncio
-import httpx
-import glob
-from tool_loader import load_all_tools
+from tool_loader import load_all_tools, TOOLS_DIR
+from core import http_pool
+from core.file_cache import FileCache
+from core.conversation import Conversation, DEFAULT_TOKEN_BUDGET, format_turns
+from core.history_store import HistoryStore
+from core.sessions import SessionManager, normalize_session_id
+from core.tool_catalog import ToolCatalog
+from core.vision import VisionPipeline
+from core.model_scheduler import scheduler as model_scheduler, preload as preload_model
+from core.executor import executor as tool_executor
+from core.cancellation import ToolCancelled, ToolTimeout
+from core.schema_validator import ToolArgumentError
+from core import serializer
+from core.tool_manifest import import_stats
+from core.tool_watcher import ToolWatcher
+from core.tool_registry import ToolRegistry
+from core.limits import ToolLimiter
 
 # ================= CONFIG =================
 PORT = 8000
 DEFAULT_OLLAMA_URL = "http://localhost:11434/api/chat"
+OLLAMA_GENERATE_URL = "http://localhost:11434/api/generate"
+SUMMARY_MODEL = "qwen2.5:1.5b"  # 오래된 대화 요약용 소형 모델
+DEFAULT_CHARACTER = "lucia"
+PRELOAD_DEFAULT_MODEL = True     # 시작 시 기본 캐릭터 모델을 미리 올려 둠
 CONFIG_FILE = "ai_config.json"
+CHAT_TIMEOUT = 180
+HISTORY_DB = os.path.join("memory_vault", "studio_history.sqlite3")
+HISTORY_PAGE_SIZE = 50
+MAX_TOOL_ROUNDS = 4      # 모델이 연쇄 호출할 수 있는 툴 라운드 최대 깊이
+TOOL_CONCURRENCY = 4     # 동시에 실행되는 툴 호출 상한 (프로세스 전체)
+VISION_MODEL = "llava"
+VISION_CONCURRENCY = 2
+VISION_CACHE_DIR = os.path.join("memory_vault", "vision_cache")
+TOOL_TOP_K = 0           # >0 이면 메시지와 관련된 상위 k개 툴만 노출 (캐릭터별 tool_top_k로 덮어쓰기)
 
 app = FastAPI(title="Local AI Studio")
 
@@ -51,11 +79,61 @@ if not os.path.exists("static"):
     os.makedirs("static")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# 로컬 툴 로드
-TOOLS = load_all_tools()
+# 로컬 툴 로드 + LLM용 카탈로그 사전 변환
+tool_registry = ToolRegistry(load_all_tools)
+tool_registry.load()
+tool_catalog = ToolCatalog(tool_registry.snapshot)
+tool_watcher = ToolWatcher([TOOLS_DIR])
 
-# 대화 내역 저장소
-history_storage = {}
+# 접속 중인 Studio 클라이언트 (툴 변경 알림용)
+studio_clients = set()
+
+# 대화 내역 저장소 (원문은 SQLite에 영속화)
+os.makedirs(os.path.dirname(HISTORY_DB), exist_ok=True)
+history_store = HistoryStore(HISTORY_DB)
+
+async def open_conversation(session_id, character, budget):
+    """(세션, 캐릭터) 대화 생성 + DB에서 복원"""
+    conv = Conversation(budget, store=history_store, character=character, session=session_id)
+    await asyncio.to_thread(conv.load)
+    return conv
+
+# 세션별 대화 (LRU + 유휴 TTL 축출)
+sessions = SessionManager(open_conversation)
+
+@app.on_event("startup")
+async def startup_event():
+    asyncio.create_task(sessions.run_sweeper())
+    asyncio.create_task(tool_watcher.run(reload_tools))
+    if PRELOAD_DEFAULT_MODEL:
+        asyncio.create_task(preload_default_model())
+
+async def preload_default_model():
+    model = get_config()["models"].get(DEFAULT_CHARACTER, {}).get("name")
+    if not model:
+        return
+    try:
+        await preload_model(model)
+    except Exception as e:
+        print(f"⚠️ Preload failed ({model}): {e}")
+
+async def reload_tools(changed=None):
+    """tools/ 변경 시 바뀐 모듈만 다시 import → 레지스트리 통째로 교체 → 클라이언트에 알림"""
+    # 실행 중인 호출은 이미 잡은 기존 handler로 끝남
+    delta = await asyncio.to_thread(tool_registry.load, True)
+    tool_catalog.ensure_fresh(tool_registry.snapshot)
+    tool_limiter.configure(tool_registry.snapshot)
+    print(f"🔄 [Tool Reload] added={delta['added']} changed={delta['changed']} removed={delta['removed']}")
+    for ws in list(studio_clients):
+        try:
+            await ws.send_json({"type": "tools_changed", **delta})
+        except Exception:
+            studio_clients.discard(ws)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await http_pool.aclose()
+    await asyncio.to_thread(history_store.close)
 
 # ================= HELPER FUNCTIONS =================
 def parse_ovos_json(data):
@@ -83,30 +161,47 @@ def parse_ovos_json(data):
             
     return prompt
 
+def _load_character(filepath):
+    """캐릭터 파일 파싱 + 시스템 프롬프트 렌더링 (파일이 바뀔 때만 호출됨)"""
+    with open(filepath, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    char_id = os.path.basename(filepath).replace(".json", "")
+    
+    sys_prompt = parse_ovos_json(data) if "speech_style" in data else data.get("system_prompt", "")
+    
+    model = {
+        "name": data.get("base_model", "qwen2.5-coder:14b"),
+        "label": f"{data.get('name', char_id)}",
+        "role_badge": data.get('role', 'Assistant'),
+        "description": data.get('description', ''),
+        "icon": data.get("icon", "fa-user"),
+        "system_prompt": sys_prompt,
+        "context_budget": data.get("context_budget", DEFAULT_TOKEN_BUDGET)
+    }
+    # 캐릭터별 선택 설정: 파일에 있을 때만 (없으면 사용하는 쪽 기본값)
+    for key in ("max_tool_rounds", "tool_top_k"):
+        if key in data:
+            model[key] = data[key]
+    return char_id, model
+
+def _load_json(filepath):
+    with open(filepath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# mtime/size 키 캐시: 변경되지 않은 파일은 디스크를 다시 읽지 않음
+character_cache = FileCache(_load_character)
+config_cache = FileCache(_load_json)
+
 def load_character_plugins():
     """캐릭터 플러그인 로드"""
     models = {}
     if not os.path.exists("characters"):
         os.makedirs("characters")
     
-    for filepath in glob.glob("characters/*.json"):
+    for filepath in character_cache.list_dir("characters", ".json"):
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                char_id = os.path.basename(filepath).replace(".json", "")
-                
-                sys_prompt = parse_ovos_json(data) if "speech_style" in data else data.get("system_prompt", "")
-                
-                models[char_id] = {
-                    "name": data.get("base_model", "qwen2.5-coder:14b"),
-                    "label": f"{data.get('name', char_id)}",
-                    "role_badge": data.get('role', 'Assistant'),
-                    "description": data.get('description', ''),
-                    "icon": data.get("icon", "fa-user"),
-                    "system_prompt": sys_prompt
-                }
-                if char_id not in history_storage:
-                    history_storage[char_id] = []
+            char_id, model = character_cache.get(filepath)
+            models[char_id] = model
         except Exception as e:
             print(f"❌ Error loading {filepath}: {e}")
             
@@ -116,31 +211,36 @@ def get_config():
     config = {"models": {}}
     if os.path.exists(CONFIG_FILE):
         try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                config = json.load(f)
+            config = config_cache.get(CONFIG_FILE)
         except:
             pass
     
-    config["models"].update(load_character_plugins())
+    # 캐시된 원본을 건드리지 않도록 얕은 복사 후 병합
+    config = {**config, "models": {**config.get("models", {}), **load_character_plugins()}}
     return config
 
 async def execute_tool(tool_name, args):
     """툴 실행"""
-    if tool_name not in TOOLS:
+    info = tool_registry.get(tool_name)
+    if info is None:
         return f"Error: Tool '{tool_name}' not found."
     
     try:
-        handler = TOOLS[tool_name]["handler"]
         print(f"🔧 [Tool Run] {tool_name}")
         print(f"📝 [Tool Args] {args}")
         
-        if asyncio.iscoroutinefunction(handler):
-            result = await handler(args)
-        else:
-            result = await asyncio.to_thread(handler, args)
+        # 툴별 timeout 적용 (초과 시 서브프로세스 트리 종료)
+        result = await tool_executor.run(info, args, name=tool_name)
         
         print(f"✅ [Tool Result] {result}")
-        return json.dumps(result, ensure_ascii=False)
+        return serializer.dumps(result)
+    except ToolArgumentError as e:
+        # 모델이 인자를 고쳐 다시 호출할 수 있도록 오류 목록 그대로 전달
+        print(f"⚠️ [Tool Args Rejected] {tool_name}: {e.errors}")
+        return serializer.dumps({"error": str(e), **e.to_dict()})
+    except (ToolTimeout, ToolCancelled) as e:
+        print(f"⏱️ [Tool {e.to_dict()['status']}] {tool_name}")
+        return serializer.dumps({"error": str(e), **e.to_dict()})
     except Exception as e:
         error_msg = f"Error executing {tool_name}: {str(e)}"
         print(f"❌ [Tool Error] {error_msg}")
@@ -150,7 +250,7 @@ async def analyze_image_with_vision_model(image_base64, prompt="이 이미지를
     """Vision 모델(Llava) 호출"""
     try:
         payload = {
-            "model": "llava",
+            "model": VISION_MODEL,
             "messages": [
                 {
                     "role": "user",
@@ -160,14 +260,139 @@ async def analyze_image_with_vision_model(image_base64, prompt="이 이미지를
             ],
             "stream": False
         }
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(DEFAULT_OLLAMA_URL, json=payload)
-            if resp.status_code == 200:
-                return resp.json()["message"]["content"]
+        client = http_pool.get_async_client()
+        async with model_scheduler.slot(VISION_MODEL) as ticket:
+            payload["keep_alive"] = ticket.keep_alive
+            resp = await client.post(DEFAULT_OLLAMA_URL, **serializer.request_body(payload), timeout=60)
+        if resp.status_code == 200:
+            return resp.json()["message"]["content"]
     except:
         return None
     return None
 
+def _coerce_message(data):
+    """Ollama 응답에서 message 필드 추출 (문자열/딕셔너리 방어)"""
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except:
+            return {"content": data}
+    if not isinstance(data, dict):
+        return {}
+    msg = data.get("message", {})
+    if isinstance(msg, str):
+        msg = {"content": msg}
+    return msg
+
+async def stream_chat(payload, websocket):
+    """
+    Ollama NDJSON 스트림을 읽어 delta 프레임으로 바로 중계.
+    조립된 message와 통계(TTFT, tokens/sec)를 반환.
+    """
+    first_token_at = None
+    parts = []
+    tool_calls = []
+    final_chunk = {}
+
+    client = http_pool.get_async_client()
+    async with model_scheduler.slot(payload["model"]) as ticket:
+        started = time.perf_counter()  # 대기열 시간은 TTFT에서 제외
+        # 대화 전체가 실리는 본문이라 빠른 인코더로 한 번만 직렬화
+        body = serializer.request_body({**payload, "stream": True, "keep_alive": ticket.keep_alive})
+        async with client.stream("POST", DEFAULT_OLLAMA_URL, **body, timeout=CHAT_TIMEOUT) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                try:
+                    chunk = serializer.loads(line)
+                except:
+                    continue
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+
+                msg = _coerce_message(chunk)
+                if msg.get("tool_calls"):
+                    tool_calls.extend(msg["tool_calls"])
+
+                delta = msg.get("content", "")
+                if delta:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(delta)
+                    await websocket.send_json({"type": "delta", "text": delta})
+
+                if chunk.get("done"):
+                    final_chunk = chunk
+                    break
+
+    finished = time.perf_counter()
+    ai_msg = {"role": "assistant", "content": "".join(parts)}
+    if tool_calls:
+        ai_msg["tool_calls"] = tool_calls
+
+    # eval_count/eval_duration(ns)이 있으면 Ollama 측정값 우선 사용
+    eval_count = final_chunk.get("eval_count") or len(parts)
+    eval_duration = final_chunk.get("eval_duration")
+    if eval_duration:
+        gen_seconds = eval_duration / 1e9
+    else:
+        gen_seconds = finished - (first_token_at or started)
+
+    stats = {
+        "ttft_ms": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+        "total_ms": round((finished - started) * 1000, 1),
+        "tokens": eval_count,
+        "tokens_per_sec": round(eval_count / gen_seconds, 2) if gen_seconds > 0 else None,
+    }
+    return ai_msg, stats
+
+async def request_chat(payload, websocket, stream):
+    """stream 여부에 따라 스트리밍/단일 응답 호출을 통일된 형태로 반환"""
+    if stream:
+        return await stream_chat(payload, websocket)
+
+    client = http_pool.get_async_client()
+    async with model_scheduler.slot(payload["model"]) as ticket:
+        started = time.perf_counter()
+        body = serializer.request_body({**payload, "stream": False, "keep_alive": ticket.keep_alive})
+        resp = await client.post(DEFAULT_OLLAMA_URL, **body, timeout=CHAT_TIMEOUT)
+    resp.raise_for_status()
+    try:
+        resp_data = serializer.loads(resp.content)
+    except:
+        resp_data = {}
+    stats = {"total_ms": round((time.perf_counter() - started) * 1000, 1)}
+    return _coerce_message(resp_data), stats
+
+async def summarize_turns(previous_summary, turns):
+    """오래된 대화 구간을 기존 요약과 합쳐 새 rolling summary 생성"""
+    prompt = (
+        "다음은 사용자와 AI 캐릭터의 이전 대화 요약과 그 이후 대화입니다.\n"
+        "둘을 합쳐 이후 대화에 필요한 사실, 결정사항, 진행 중인 작업, 파일 경로만 "
+        "간결한 한국어 bullet 목록으로 요약하세요.\n\n"
+        f"[기존 요약]\n{previous_summary or '(없음)'}\n\n"
+        f"[대화]\n{format_turns(turns)}\n\n[새 요약]\n"
+    )
+    client = http_pool.get_async_client()
+    async with model_scheduler.slot(SUMMARY_MODEL) as ticket:
+        resp = await client.post(OLLAMA_GENERATE_URL, **serializer.request_body({
+            "model": SUMMARY_MODEL,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": ticket.keep_alive,
+        }))
+    resp.raise_for_status()
+    return serializer.loads(resp.content).get("response", "").strip()
+
+# 이미지 해시 캐시 + 동시 분석 + 업로드 전 축소
+vision = VisionPipeline(
+    analyze_image_with_vision_model,
+    model=VISION_MODEL,
+    max_concurrency=VISION_CONCURRENCY,
+    disk_dir=VISION_CACHE_DIR,
+)
+
 # ================= API ENDPOINTS =================
 @app.get("/")
 async def get_ui():
@@ -180,14 +405,169 @@ async def get_ui():
 async def list_models():
     return get_config().get("models", {})
 
+@app.get("/stats")
+async def get_stats():
+    return {
+        "config_cache": config_cache.stats(),
+        "character_cache": character_cache.stats(),
+        "history_store": history_store.stats(),
+        "sessions": sessions.stats(),
+        "tool_catalog": tool_catalog.stats(),
+        "vision": vision.stats(),
+        "model_scheduler": model_scheduler.stats(),
+        "executor": tool_executor.stats(),
+        "tool_registry": tool_registry.stats(),
+        "tool_limiter": tool_limiter.stats(),
+        "tool_imports": import_stats(),
+        "tool_reloads": tool_watcher.reloads,
+    }
+
 @app.get("/history/{model_id}")
-async def get_history(model_id: str):
-    return history_storage.get(model_id, [])
+async def get_history(model_id: str, session: str = "default", before: int = None,
+                      limit: int = HISTORY_PAGE_SIZE):
+    """세션의 최신 limit개부터, before(seq) 커서로 이전 페이지 조회"""
+    limit = max(1, min(limit, 500))
+    page = await asyncio.to_thread(history_store.page, model_id, session, before, limit)
+    conv = sessions.peek(session, model_id)
+    page["compaction"] = conv.state() if conv else None
+    return page
 
 # ================= WEBSOCKET CORE =================
+# 전역 상한 + 툴별 max_concurrency (unity 툴 등은 agent_server와 같은 제한)
+tool_limiter = ToolLimiter(tool_registry.snapshot, global_limit=TOOL_CONCURRENCY)
+
+async def run_tool_calls(websocket, tool_calls):
+    """
+    한 턴의 툴 호출들을 동시 실행 (상한 TOOL_CONCURRENCY, 툴별 max_concurrency).
+    결과는 호출 순서대로 반환. 각 항목: (이름, 결과 문자열, 소요 ms)
+    """
+    async def run_one(tool_call):
+        fn = tool_call.get("function", {})
+        t_name = fn.get("name")
+        t_args = fn.get("arguments") or {}
+        if isinstance(t_args, str):
+            try:
+                t_args = json.loads(t_args)
+            except:
+                t_args = {}
+
+        async with tool_limiter.acquire(t_name):
+            await websocket.send_json({"type": "status", "text": f"💻 {t_name} 실행 중..."})
+            started = time.perf_counter()
+            result = await execute_tool(t_name, t_args)
+            return t_name, result, round((time.perf_counter() - started) * 1000, 1)
+
+    return await asyncio.gather(*(run_one(c) for c in tool_calls))
+
+async def handle_chat_turn(websocket, conv, current_model, data):
+    """한 번의 사용자 메시지 처리 (비전 → LLM → 툴 → 최종 답변)"""
+    user_msg = data.get("message", "")
+    files = data.get("files", [])
+    system_prompt = current_model.get("system_prompt", "")
+
+    # 2. 이미지 처리 (Vision Proxy) - 첨부 이미지 동시 분석
+    images = [f['content'] for f in files if f['type'] == 'image']
+    vision_results = []
+    if images:
+        await websocket.send_json({"type": "status", "text": f"👁️ 이미지 {len(images)}장을 보는 중..."})
+        vision_results = await vision.analyze_many(images, "이 이미지를 자세히 설명해줘.")
+    vision_iter = iter(vision_results)
+
+    images_processed_context = ""
+    for f in files:
+        if f['type'] == 'image':
+            vision_result = next(vision_iter)
+            if vision_result:
+                images_processed_context += f"\n[이미지 분석 결과: {vision_result}]\n"
+            else:
+                images_processed_context += "\n[시스템: 이미지 분석 실패 (Llava 모델 필요)]\n"
+        elif f['type'] == 'text':
+            images_processed_context += f"\n\n--- [파일: {f['name']}] ---\n{f['content']}\n------------------\n"
+
+    final_user_msg = images_processed_context + "\n" + user_msg if images_processed_context else user_msg
+    conv.append({"role": "user", "content": final_user_msg})
+
+    # 3. Ollama 호출 준비 (카탈로그는 레지스트리가 바뀔 때만 재생성)
+    tool_catalog.ensure_fresh(tool_registry.snapshot)
+    ollama_tools = tool_catalog.select(user_msg, current_model.get("tool_top_k", TOOL_TOP_K))
+
+    # Payload 생성
+    payload = {
+        "model": current_model.get("name", "qwen2.5-coder:14b"),
+        "messages": conv.window(system_prompt),
+        "tools": ollama_tools,
+    }
+    stream = bool(data.get("stream", False))
+    max_rounds = current_model.get("max_tool_rounds", MAX_TOOL_ROUNDS)
+    tool_rounds = []
+    try:
+        while True:
+            ai_msg, stats = await request_chat(payload, websocket, stream)
+
+            # 4. 툴 사용 여부 체크
+            # 텍스트 응답에서 도구 호출 파싱 시도 (qwen2.5-coder 등)
+            tools_enabled = "tools" in payload
+            if tools_enabled and not ai_msg.get("tool_calls"):
+                text_content = ai_msg.get("content", "")
+                parsed = parse_text_tool_call(text_content)
+                if parsed:
+                    ai_msg = {"role": "assistant", "content": "", **parsed}
+                    print(f"🔍 [Text Tool Parsed] 텍스트에서 도구 호출 감지!")
+
+            if not (tools_enabled and ai_msg.get("tool_calls")):
+                break
+
+            # 스트리밍 중 흘려보낸 도구 호출 텍스트는 화면에서 제거
+            if stream:
+                await websocket.send_json({"type": "reset"})
+
+            conv.append(ai_msg)
+
+            # 같은 라운드의 툴은 독립적이므로 동시에 실행 (총 시간 = 최댓값)
+            round_started = time.perf_counter()
+            results = await run_tool_calls(websocket, ai_msg["tool_calls"])
+            for _, tool_result, _ in results:
+                conv.append({
+                    "role": "tool",
+                    "content": tool_result,
+                })
+
+            round_info = {
+                "round": len(tool_rounds) + 1,
+                "latency_ms": round((time.perf_counter() - round_started) * 1000, 1),
+                "tools": [{"name": name, "latency_ms": ms} for name, _, ms in results],
+            }
+            tool_rounds.append(round_info)
+            await websocket.send_json({"type": "tool_round", **round_info})
+
+            # 툴 결과 반영 후 재호출 (깊이 한도에 닿으면 툴 없이 최종 답변 유도)
+            payload["messages"] = conv.window(system_prompt)
+            if len(tool_rounds) >= max_rounds:
+                payload.pop("tools", None)
+
+        # 최종 답변 (스트리밍이어도 조립된 한 건만 기록)
+        content = ai_msg.get("content", "")
+        conv.append({"role": "assistant", "content": content})
+
+        # 예산 초과 시 오래된 턴을 백그라운드에서 요약 (응답 지연 없음)
+        conv.maybe_compact(summarize_turns)
+        if stream:
+            await websocket.send_json({"type": "done", "text": content, "tool_rounds": tool_rounds, **stats})
+        else:
+            await websocket.send_json({"type": "answer", "text": content, "tool_rounds": tool_rounds})
+
+    except Exception as e:
+        print(f"Error: {e}")
+        await websocket.send_json({"type": "error", "text": f"AI 응답 실패: {str(e)}"})
+
 @app.websocket("/ws/chat")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    studio_clients.add(websocket)
+
+    # 탭(세션)마다 독립된 대화: 재접속 시 같은 id를 보내면 이어서 사용
+    session_id = normalize_session_id(websocket.query_params.get("session"))
+    await websocket.send_json({"type": "session", "session_id": session_id})
     
     try:
         while True:
@@ -209,8 +589,6 @@ async def websocket_endpoint(websocket: WebSocket):
             except Exception:
                 break
             
-            user_msg = data.get("message", "")
-            files = data.get("files", [])
             model_key = data.get("model", "lucia")
             
             config = get_config()
@@ -221,127 +599,15 @@ async def websocket_endpoint(websocket: WebSocket):
             if not current_model:
                 continue
 
-            if model_key not in history_storage:
-                history_storage[model_key] = []
-
-            # 2. 이미지 처리 (Vision Proxy)
-            images_processed_context = ""
-            for f in files:
-                if f['type'] == 'image':
-                    await websocket.send_json({"type": "status", "text": "👁️ 이미지를 보는 중..."})
-                    vision_result = await analyze_image_with_vision_model(f['content'])
-                    if vision_result:
-                        images_processed_context += f"\n[이미지 분석 결과: {vision_result}]\n"
-                    else:
-                        images_processed_context += "\n[시스템: 이미지 분석 실패 (Llava 모델 필요)]\n"
-                elif f['type'] == 'text':
-                    images_processed_context += f"\n\n--- [파일: {f['name']}] ---\n{f['content']}\n------------------\n"
-
-            final_user_msg = images_processed_context + "\n" + user_msg if images_processed_context else user_msg
-            history_storage[model_key].append({"role": "user", "content": final_user_msg})
-
-            # 3. Ollama 호출 준비
-            ollama_tools = []
-            for name, info in TOOLS.items():
-                ollama_tools.append({
-                    "type": "function",
-                    "function": {
-                        "name": name,
-                        "description": info.get("description", ""),
-                        "parameters": info.get("inputSchema", {})
-                    }
-                })
-
-            # Payload 생성
-            payload = {
-                "model": current_model.get("name", "qwen2.5-coder:14b"),
-                "messages": [
-                    {"role": "system", "content": current_model.get("system_prompt", "")}
-                ] + history_storage[model_key],
-                "tools": ollama_tools,
-                "stream": False
-            }
-            try:
-                async with httpx.AsyncClient(timeout=180) as client:
-                    resp = await client.post(DEFAULT_OLLAMA_URL, json=payload)
-                    resp.raise_for_status()
-                    
-                    # [핵심] 응답 데이터 파싱 및 타입 방어
-                    try:
-                        resp_data = resp.json()
-                    except:
-                        resp_data = {}
-
-                    # 문자열로 오면 JSON 파싱 재시도
-                    if isinstance(resp_data, str):
-                        try:
-                            resp_data = json.loads(resp_data)
-                        except:
-                            resp_data = {"message": {"content": str(resp_data)}}
-
-                    ai_msg = resp_data.get("message", {})
-
-                    # [★여기가 수정됨★] message 필드가 문자열이면 딕셔너리로 변환
-                    if isinstance(ai_msg, str):
-                        ai_msg = {"content": ai_msg}
-
-                    # 4. 툴 사용 여부 체크
-                    # 텍스트 응답에서 도구 호출 파싱 시도 (qwen2.5-coder 등)
-                    if isinstance(ai_msg, dict) and not ai_msg.get("tool_calls"):
-                        text_content = ai_msg.get("content", "")
-                        parsed = parse_text_tool_call(text_content)
-                        if parsed:
-                            ai_msg = parsed
-                            print(f"🔍 [Text Tool Parsed] 텍스트에서 도구 호출 감지!")
-                    
-                    if isinstance(ai_msg, dict) and ai_msg.get("tool_calls"):
-                        history_storage[model_key].append(ai_msg)
-                        
-                        for tool_call in ai_msg["tool_calls"]:
-                            fn = tool_call["function"]
-                            t_name = fn["name"]
-                            t_args = fn["arguments"]
-                            
-                            await websocket.send_json({"type": "status", "text": f"💻 {t_name} 실행 중..."})
-                            
-                            # 툴 실행
-                            tool_result = await execute_tool(t_name, t_args)
-                            
-                            history_storage[model_key].append({
-                                "role": "tool",
-                                "content": tool_result,
-                            })
-                        
-                        # 툴 결과 반영 후 재호출
-                        payload["messages"] = [{"role": "system", "content": current_model.get("system_prompt", "")}] + history_storage[model_key]
-                        del payload["tools"]
-                        
-                        final_resp = await client.post(DEFAULT_OLLAMA_URL, json=payload)
-                        final_data = final_resp.json()
-                        
-                        final_msg_obj = final_data.get("message", {})
-                        if isinstance(final_msg_obj, str):
-                            final_msg_obj = {"content": final_msg_obj}
-                            
-                        final_content = final_msg_obj.get("content", "")
-                        
-                        history_storage[model_key].append({"role": "assistant", "content": final_content})
-                        await websocket.send_json({"type": "answer", "text": final_content})
-
-                    else:
-                        # 일반 답변
-                        content = ai_msg.get("content", "")
-                        history_storage[model_key].append({"role": "assistant", "content": content})
-                        await websocket.send_json({"type": "answer", "text": content})
-
-            except Exception as e:
-                print(f"Error: {e}")
-                await websocket.send_json({"type": "error", "text": f"AI 응답 실패: {str(e)}"})
+            budget = current_model.get("context_budget", DEFAULT_TOKEN_BUDGET)
+            async with sessions.acquire(session_id, model_key, budget) as conv:
+                await handle_chat_turn(websocket, conv, current_model, data)
 
     except Exception as e:
         print(f"WebSocket Error: {e}")
     finally:
-        print("Client disconnected.")
+        studio_clients.discard(websocket)
+        print(f"Client disconnected. (session={session_id})")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=PORT)
\ No newline at end of file
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""툴 인자 검증 오버헤드 벤치마크: 컴파일된 검증 함수 (core.schema_validator) 호출당 비용"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.schema_validator import compile_validator
+
+try:
+    import jsonschema  # 비교용 (선택)
+except ImportError:
+    jsonschema = None
+
+# tools/file_tools.py resource.batch_update 와 같은 스키마
+BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "resources": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"path": {"type": "string"}, "content": {"type": "string"},
+                               "target_id": {"type": "string"}, "payload": {"type": "string"}},
+                "anyOf": [{"required": ["path"]}, {"required": ["target_id"]}],
+            },
+        }
+    },
+    "required": ["resources"],
+}
+
+WORKSPACE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"type": "string", "enum": ["init", "scan", "load", "save", "backup"]},
+        "path": {"type": "string"},
+        "filename": {"type": "string"},
+        "content": {"type": "string"},
+    },
+    "required": ["action"],
+}
+
+SEARCH_SCHEMA = {
+    "type": "object",
+    "properties": {"query": {"type": "string"}, "max_results": {"type": "integer", "default": 3}},
+    "required": ["query"],
+}
+
+CASES = [
+    ("web.search", SEARCH_SCHEMA, {"query": "Unity 6 새로운 기능", "max_results": 5}),
+    ("workspace", WORKSPACE_SCHEMA, {"action": "save", "filename": "a.cs", "content": "x" * 2000}),
+    ("resource.batch_update (20 files)", BATCH_SCHEMA,
+     {"resources": [{"path": f"Assets/Scripts/F{i}.cs", "content": "class A {}" * 50} for i in range(20)]}),
+]
+
+
+def bench(func, number=20000):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    return seconds / number * 1e6  # us/op
+
+
+def main():
+    for name, schema, args in CASES:
+        validate = compile_validator(schema)
+        assert validate(args) == []
+        compiled = bench(lambda: validate(args))
+        line = f"[{name}]  compiled {compiled:7.2f} us/call"
+        if jsonschema is not None:
+            checker = jsonschema.Draft7Validator(schema)
+            line += f"   jsonschema {bench(lambda: checker.is_valid(args), 2000):8.2f} us/call"
+        print(line)
+
+    # 오류 메시지 예시 (LLM에게 그대로 전달됨)
+    print()
+    print(compile_validator(BATCH_SCHEMA)({"resources": [{"content": "x"}, {"path": 3, "content": "y"}]}))
+    print(compile_validator(WORKSPACE_SCHEMA)({"action": "delete"}))
+    print(compile_validator(SEARCH_SCHEMA)({"max_results": "3"}))
+
+
+if __name__ == "__main__":
+    main()
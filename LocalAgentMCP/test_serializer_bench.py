@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""JSON 직렬화 마이크로 벤치마크: stdlib json vs core.serializer (orjson)"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import serializer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _read(path):
+    with open(os.path.join(BASE_DIR, path), "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def build_payloads():
+    """실제 트래픽과 비슷한 페이로드"""
+    # 1) Ollama /api/chat 본문: 시스템 프롬프트 + 긴 한국어 대화 + 툴 카탈로그
+    history = []
+    for i in range(40):
+        history.append({"role": "user", "content": f"{i}번째 질문입니다. 이 파일의 구조를 설명하고 개선점을 알려줘." * 3})
+        history.append({"role": "assistant", "content": "네, 설명드리겠습니다. " * 60})
+    tools = [{
+        "type": "function",
+        "function": {
+            "name": f"tool.{i}",
+            "description": "Read or write a resource in the local workspace",
+            "parameters": {"type": "object", "properties": {"path": {"type": "string"}, "content": {"type": "string"}},
+                           "required": ["path"]},
+        },
+    } for i in range(30)]
+    chat = {"model": "qwen3-coder:30b", "messages": [{"role": "system", "content": "당신은 루시아입니다. " * 100}] + history,
+            "tools": tools, "stream": True, "options": {"temperature": 0.7, "num_ctx": 8192}}
+
+    # 2) 파일 전체를 담은 툴 결과 (workspace load 유사)
+    sources = {name: _read(name) for name in ("studio_server.py", "agent_server.py", "studio.html") if os.path.exists(os.path.join(BASE_DIR, name))}
+    file_result = {"id": "req-123", "result": {"files": sources, "count": len(sources)}}
+
+    # 3) 작은 릴레이 메시지 (대부분의 트래픽)
+    small = {"id": "req-1", "tool": "resource.read", "args": {"path": "C:/project/Assets/Scripts/Player.cs"}}
+
+    return {"ollama_chat": chat, "file_result": file_result, "small_relay": small}
+
+
+def bench(label, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    return seconds / number * 1e6  # us/op
+
+
+def main():
+    print(f"serializer backend: {serializer.BACKEND}")
+    if serializer.BACKEND == "stdlib":
+        print("(orjson 미설치 → 두 결과가 같은 경로. pip install orjson 후 다시 실행)")
+
+    for name, payload in build_payloads().items():
+        size = len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        number = 2000 if size < 10_000 else 50
+        encoded = serializer.dumps_bytes(payload)
+
+        std_enc = bench("stdlib dumps", lambda: json.dumps(payload, ensure_ascii=False).encode("utf-8"), number)
+        fast_enc = bench("serializer dumps", lambda: serializer.dumps_bytes(payload), number)
+        std_dec = bench("stdlib loads", lambda: json.loads(encoded), number)
+        fast_dec = bench("serializer loads", lambda: serializer.loads(encoded), number)
+
+        assert serializer.loads(encoded) == payload
+        print(f"\n[{name}] {size / 1024:.1f} KiB")
+        print(f"  encode  stdlib {std_enc:10.1f} us   serializer {fast_enc:10.1f} us   x{std_enc / fast_enc:.1f}")
+        print(f"  decode  stdlib {std_dec:10.1f} us   serializer {fast_dec:10.1f} us   x{std_dec / fast_dec:.1f}")
+
+
+if __name__ == "__main__":
+    main()
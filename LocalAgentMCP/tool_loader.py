@@ -13,19 +13,21 @@
 #             "handler": callable
 #         }
 #     }
+# - 시작 시에는 manifest만 읽고, 모듈은 툴이 처음 호출될 때 import
 # ===============================================================
 
 import os
-import importlib
 import logging
 from typing import Dict, Any
 
+from core.tool_manifest import load_tools_from_dir
+
 logger = logging.getLogger("ToolLoader")
 
 TOOLS_DIR = os.path.join(os.path.dirname(__file__), "tools")
 
 
-def load_all_tools() -> Dict[str, Dict[str, Any]]:
+def load_all_tools(reload: bool = False) -> Dict[str, Dict[str, Any]]:
     """
     Loads all MCP tool modules inside /tools.
     Each module must define:
@@ -39,61 +41,15 @@ def load_all_tools() -> Dict[str, Dict[str, Any]]:
         }
 
     Returns a merged tool registry.
+    reload=True: 이미 import된 모듈 중 소스가 바뀐 것을 새로 import (핫 리로드)
     """
-    registry: Dict[str, Dict[str, Any]] = {}
-
     if not os.path.isdir(TOOLS_DIR):
         logger.warning(f"[ToolLoader] Tools dir not found, creating: {TOOLS_DIR}")
         os.makedirs(TOOLS_DIR, exist_ok=True)
-        return registry
-
-    for filename in os.listdir(TOOLS_DIR):
-        if not filename.endswith(".py") or filename.startswith("_"):
-            continue
-
-        module_name = filename[:-3]
-        module_path = f"tools.{module_name}"
-
-        try:
-            module = importlib.import_module(module_path)
-        except Exception as e:
-            logger.error(f"[ToolLoader] Failed to import {module_name}: {e}")
-            continue
-
-        # -----------------------------------------
-        # TOOL_DEFINITIONS 검색
-        # -----------------------------------------
-        if not hasattr(module, "TOOL_DEFINITIONS"):
-            logger.info(f"[ToolLoader] Skipped {module_name}: no TOOL_DEFINITIONS")
-            continue
-
-        tool_defs = getattr(module, "TOOL_DEFINITIONS")
-
-        if not isinstance(tool_defs, dict):
-            logger.error(f"[ToolLoader] Invalid TOOL_DEFINITIONS in {module_name}")
-            continue
-
-        # -----------------------------------------
-        # 각 Tool 검증 및 등록
-        # -----------------------------------------
-        for tool_name, tool_data in tool_defs.items():
-            if tool_name in registry:
-                logger.warning(f"[ToolLoader] Duplicate tool name: {tool_name} (ignored)")
-                continue
-
-            handler = tool_data.get("handler")
-            if not callable(handler):
-                logger.error(f"[ToolLoader] Tool '{tool_name}' missing valid handler()")
-                continue
-
-            # inputSchema 기본값 보정
-            schema = tool_data.get("inputSchema", {})
-            if not isinstance(schema, dict):
-                logger.warning(f"[ToolLoader] Fixing invalid inputSchema for {tool_name}")
-                tool_data["inputSchema"] = {}
+        return {}
 
-            registry[tool_name] = tool_data
-            logger.info(f"[ToolLoader] Loaded tool: {tool_name}")
+    # manifest에 캐시된 선언으로 등록, 모듈 import는 첫 호출 시 (core/tool_manifest.py)
+    registry = load_tools_from_dir("tools", TOOLS_DIR, reload=reload)
 
     logger.info(f"[ToolLoader] Total Tools Loaded: {len(registry)}")
     return registry
@@ -1,4 +1,4 @@
-import requests
+from core.http_pool import get_sync_client
 from ollama_client import OllamaClient
 
 # 기본 모델
@@ -10,7 +10,7 @@ def ai_list_models_handler(args: dict):
     """
     try:
         # Ollama API를 통해 태그 목록 조회
-        resp = requests.get("http://localhost:11434/api/tags")
+        resp = get_sync_client().get("http://localhost:11434/api/tags")
         if resp.status_code == 200:
             data = resp.json()
             models = [m["name"] for m in data.get("models", [])]
@@ -2,6 +2,8 @@ import os
 import fnmatch
 import asyncio
 
+from core.jobs import report
+
 # -------------------------------------------------------
 # [내부 함수] 실제 I/O 처리
 # -------------------------------------------------------
@@ -45,7 +47,7 @@ async def resource_batch_update_handler(args: dict):
     resources = args.get("resources", [])
     results = []
     success_count = 0
-    for item in resources:
+    for index, item in enumerate(resources):
         path = item.get("target_id") or item.get("path")
         content = item.get("payload") or item.get("content") or ""
         try:
@@ -54,6 +56,9 @@ async def resource_batch_update_handler(args: dict):
             success_count += 1
         except Exception as e:
             results.append(f"[FAIL] {path} : {str(e)}")
+        # job 모드면 파일마다 진행률 + 결과 한 줄 보고
+        report(progress=(index + 1) / len(resources), message=f"{index + 1}/{len(resources)} files",
+               output=results[-1])
     return {"status": "success", "summary": f"Processed {len(resources)} files.", "details": results}
 
 def resource_search_handler(args: dict):
@@ -121,11 +126,16 @@ TOOL_DEFINITIONS = {
                         "type": "object",
                         "properties": {
                             "path": {"type": "string"},
-                            "content": {"type": "string"}
-                        }
+                            "content": {"type": "string"},
+                            "target_id": {"type": "string", "description": "Alias for path"},
+                            "payload": {"type": "string", "description": "Alias for content"}
+                        },
+                        # path 또는 target_id 중 하나는 있어야 함 (빈 경로로 쓰기 시도 방지)
+                        "anyOf": [{"required": ["path"]}, {"required": ["target_id"]}]
                     }
                 }
-            }
+            },
+            "required": ["resources"]
         },
         "handler": resource_batch_update_handler
     },
@@ -1,7 +1,7 @@
 # github_tools.py
 # GitHub Raw Content Fetch Tool
 
-import requests
+from core.http_pool import get_sync_client
 
 def github_fetch_file(args: dict):
     """
@@ -28,7 +28,8 @@ def github_fetch_file(args: dict):
     )
     
     try:
-        res = requests.get(raw_url, timeout=15)
+        # httpx는 기본으로 리다이렉트를 따르지 않음 (이름이 바뀐 저장소/브랜치는 301/302)
+        res = get_sync_client().get(raw_url, timeout=15, follow_redirects=True)
 
         if res.status_code == 200:
             return {
@@ -1,7 +1,15 @@
 import os
-import subprocess
 import platform
 import psutil
+from core.cancellation import run_subprocess
+from core.jobs import report
+
+def _decode(data: bytes) -> str:
+    # cp949 우선 (한글 윈도우), 실패 시 utf-8
+    try:
+        return data.decode('cp949', errors='ignore')
+    except:
+        return data.decode('utf-8', errors='ignore')
 
 def system_shell_handler(args: dict):
     command = args.get("command", "")
@@ -14,21 +22,18 @@ def system_shell_handler(args: dict):
 
     try:
         # [핵심 수정] 한글 윈도우 호환성 (cp949)
-        result = subprocess.run(
+        # 툴 타임아웃/취소 시 프로세스 트리째 종료되도록 run_subprocess 사용
+        result = run_subprocess(
             command,
             shell=True,
             cwd=cwd,
-            capture_output=True,
             text=False, # 바이너리로 받아서 수동 디코딩
+            on_output=lambda line: report(output=_decode(line)),  # job 모드면 줄 단위 부분 출력
         )
         
         # 수동 디코딩 (한글 깨짐 방지)
-        try:
-            stdout_txt = result.stdout.decode('cp949', errors='ignore')
-            stderr_txt = result.stderr.decode('cp949', errors='ignore')
-        except:
-            stdout_txt = result.stdout.decode('utf-8', errors='ignore')
-            stderr_txt = result.stderr.decode('utf-8', errors='ignore')
+        stdout_txt = _decode(result.stdout)
+        stderr_txt = _decode(result.stderr)
 
         return {
             "exitCode": result.returncode,
@@ -60,7 +65,8 @@ TOOL_DEFINITIONS = {
     "local_system.shell": {
         "description": "Run Shell Command",
         "inputSchema": { "type": "object", "properties": { "command": {"type": "string"} }, "required": ["command"] },
-        "handler": system_shell_handler
+        "handler": system_shell_handler,
+        "timeout": 300
     },
     "local_system.ps": {
         "description": "List Processes",
@@ -1,12 +1,14 @@
-import requests
 import json
 
+from core.http_pool import get_sync_client
+from core import serializer
+
 UNITY_SERVER_URL = "http://127.0.0.1:8080"
 
 def send_to_unity(payload: dict):
     try:
         # 유니티 C# 서버로 HTTP POST 전송
-        resp = requests.post(UNITY_SERVER_URL, json=payload, timeout=1)
+        resp = get_sync_client().post(UNITY_SERVER_URL, **serializer.request_body(payload), timeout=1)
         return {"status": "executed", "unity_response": "Connected"}
     except:
         return {"status": "failed", "message": "Unity Editor Not Connected (Check Port 8080)"}
@@ -21,11 +23,13 @@ TOOL_DEFINITIONS = {
     "unity.create_object": {
         "description": "Spawn Object in Unity",
         "inputSchema": { "type": "object", "properties": { "object_type": {"type": "string"} }, "required": ["object_type"] },
-        "handler": unity_create_object_handler
+        "handler": unity_create_object_handler,
+        "max_concurrency": 1
     },
     "unity.run": {
         "description": "Run Unity Command",
         "inputSchema": { "type": "object", "properties": { "command": {"type": "string"} }, "required": ["command"] },
-        "handler": unity_run_command_handler
+        "handler": unity_run_command_handler,
+        "max_concurrency": 1
     }
 }
\ No newline at end of file
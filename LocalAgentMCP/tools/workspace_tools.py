@@ -12,6 +12,8 @@ import json
 import time
 from datetime import datetime
 
+from core.jobs import report
+
 ROOT = r"C:/AshenWard"
 DIR_HISTORY = os.path.join(ROOT, "gpt_history")
 DIR_DOCS = os.path.join(ROOT, "gpt_docs")
@@ -93,8 +95,9 @@ def load_project_files(path: str):
 
     files = scan["files"]
     result = {}
+    report(progress=0.0, message=f"loading {len(files)} files")
 
-    for f in files:
+    for index, f in enumerate(files, 1):
         ext = os.path.splitext(f)[1].lower()
         if ext in TEXT_EXT:
             try:
@@ -102,6 +105,9 @@ def load_project_files(path: str):
                     result[f] = fp.read()
             except Exception as e:
                 result[f] = f"[ERROR] Cannot read file: {e}"
+        # job 모드면 진행률 보고 (파일이 많을 때 보고 자체가 부담되지 않도록 100개마다)
+        if index % 100 == 0 or index == len(files):
+            report(progress=index / len(files), message=f"{index}/{len(files)} files")
 
     return {
         "project_root": path,